@@ -1,3 +1,4 @@
+from functools import cache
 import os
 import sys
 from pathlib import Path
@@ -17,14 +18,42 @@ DATA_DIR = (
     Path(os.environ.get("MCP_LOCAL_RAG_DATA_DIR", _default_data_base()))
     / "mcp-local-rag"
 )
+EMBED_BATCH_SIZE = int(os.environ.get("MCP_LOCAL_RAG_EMBED_BATCH_SIZE", "128"))
 EMBEDDING_MODEL = os.environ.get(
     "MCP_LOCAL_RAG_EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5"
 )
+GEMINI_FAILURE_FALLBACK = os.environ.get(
+    "MCP_LOCAL_RAG_GEMINI_FAILURE_FALLBACK", "error"
+).lower()
+if GEMINI_FAILURE_FALLBACK not in ("error", "pymupdf"):
+    raise ValueError(
+        "MCP_LOCAL_RAG_GEMINI_FAILURE_FALLBACK must be one of: error, pymupdf"
+    )
+GEMINI_MAX_RETRIES = int(os.environ.get("MCP_LOCAL_RAG_GEMINI_MAX_RETRIES", "6"))
 GEMINI_MODEL = os.environ.get("MCP_LOCAL_RAG_GEMINI_MODEL", "gemini-3-pro-preview")
+GEMINI_PAGES_PER_REQUEST = max(
+    1, int(os.environ.get("MCP_LOCAL_RAG_GEMINI_PAGES_PER_REQUEST", "1"))
+)
+GEMINI_PDF_MEDIA_RESOLUTION = os.environ.get(
+    "MCP_LOCAL_RAG_GEMINI_PDF_MEDIA_RESOLUTION", "medium"
+).lower()
+if GEMINI_PDF_MEDIA_RESOLUTION not in ("low", "medium", "high"):
+    raise ValueError(
+        "MCP_LOCAL_RAG_GEMINI_PDF_MEDIA_RESOLUTION must be one of: low, medium, high"
+    )
+GEMINI_REQUESTS_PER_MINUTE = int(os.environ.get("MCP_LOCAL_RAG_GEMINI_RPM", "0"))
+INDEX_IGNORE_DIRS: frozenset[str] = frozenset(
+    name.strip()
+    for name in os.environ.get(
+        "MCP_LOCAL_RAG_INDEX_IGNORE_DIRS", ".git,.venv,__pycache__,node_modules"
+    ).split(",")
+    if name.strip()
+)
 MAX_CONCURRENT_FILES = int(os.environ.get("MCP_LOCAL_RAG_MAX_CONCURRENT_FILES", "32"))
 MAX_CONCURRENT_GEMINI = int(
     os.environ.get("MCP_LOCAL_RAG_MAX_CONCURRENT_GEMINI", "128")
 )
+QDRANT_HNSW_EF = int(os.environ.get("MCP_LOCAL_RAG_QDRANT_HNSW_EF", "0"))
 
 QDRANT_URL: str | None = os.environ.get("MCP_LOCAL_RAG_QDRANT_URL")
 
@@ -61,6 +90,7 @@ SUPPORTED_EXTENSIONS = {
     ".webp": "image",
     ".xlsx": "xlsx",
 }
+SUPPORTED_SUFFIXES: frozenset[str] = frozenset(SUPPORTED_EXTENSIONS)
 
 AZURE_DI_SUPPORTED_EXTENSIONS: set[str] = {
     ".bmp",
@@ -114,7 +144,10 @@ IMAGE_MIME_TYPES: dict[str, str] = {
 }
 
 
+@cache
 def ensure_data_dir() -> None:
+    # Cached: the directories only need creating once per process, and every
+    # store constructor calls this.
     DATA_DIR.mkdir(parents=True, exist_ok=True)
     MARKDOWN_DIR.mkdir(parents=True, exist_ok=True)
     QDRANT_PATH.mkdir(parents=True, exist_ok=True)
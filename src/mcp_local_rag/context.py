@@ -8,6 +8,8 @@ from mcp.server.fastmcp import Context
 from mcp.server.session import ServerSession
 from mcp.types import CallToolRequest
 
+from mcp_local_rag.processing.batching import EmbeddingBatcher, QueryEmbeddingBatcher
+from mcp_local_rag.processing.ratelimit import RateLimiter
 from mcp_local_rag.storage.metadata import MetadataStore
 from mcp_local_rag.storage.vectors import VectorStore
 
@@ -16,11 +18,14 @@ if TYPE_CHECKING:
     from google import genai as _genai
 
 
-@dataclass
+@dataclass(slots=True)
 class AppContext:
     azure_di_client: DocumentIntelligenceClient | None
     gemini_client: _genai.Client | None
     gemini_semaphore: asyncio.Semaphore
+    gemini_rate_limiter: RateLimiter | None
+    embedding_batcher: EmbeddingBatcher
+    query_batcher: QueryEmbeddingBatcher
     metadata_store: MetadataStore
     vector_store: VectorStore
 
@@ -6,6 +6,7 @@ from mcp_local_rag.processing.extractors import (
     ExtractionMethod,
     get_file_mtime,
     is_supported_file,
+    is_supported_name,
 )
 
 __all__ = [
@@ -16,4 +17,5 @@ __all__ = [
     "ExtractionMethod",
     "get_file_mtime",
     "is_supported_file",
+    "is_supported_name",
 ]
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+from mcp_local_rag.processing.embeddings import embed_queries, embed_texts
+
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+
+# Upper bound on texts merged into one model call; a single larger request
+# still goes through on its own.
+_MAX_MERGED_TEXTS = 1024
+# Queries are short and latency-bound, so their batches stay small.
+_MAX_MERGED_QUERIES = 64
+
+
+class EmbeddingBatcher:
+    """Merge concurrent ``embed`` calls into shared model invocations.
+
+    Files are indexed concurrently, and each one used to run its own
+    ``embed_texts`` call. Requests that arrive while the model is busy are
+    queued and encoded together on the next call, so many small documents
+    share full-size batches instead of each paying the per-call overhead.
+    """
+
+    def __init__(self, max_texts: int = _MAX_MERGED_TEXTS) -> None:
+        self._max_texts = max_texts
+        self._pending: list[tuple[list[str], asyncio.Future[NDArray[np.float32]]]] = []
+        self._worker: asyncio.Task[None] | None = None
+
+    async def embed(self, texts: list[str]) -> NDArray[np.float32]:
+        future: asyncio.Future[NDArray[np.float32]] = (
+            asyncio.get_running_loop().create_future()
+        )
+        self._pending.append((texts, future))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._drain())
+        return await future
+
+    async def _drain(self) -> None:
+        while self._pending:
+            # One loop turn lets callers scheduled alongside this one join.
+            await asyncio.sleep(0)
+            batch = self._take_batch()
+            if not batch:
+                continue
+            texts = [text for request, _ in batch for text in request]
+            try:
+                embeddings = await asyncio.to_thread(self._encode, texts)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            start = 0
+            for request, future in batch:
+                end = start + len(request)
+                if not future.done():
+                    future.set_result(embeddings[start:end])
+                start = end
+
+    def _encode(self, texts: list[str]) -> NDArray[np.float32]:
+        return embed_texts(texts)
+
+    def _take_batch(
+        self,
+    ) -> list[tuple[list[str], asyncio.Future[NDArray[np.float32]]]]:
+        batch: list[tuple[list[str], asyncio.Future[NDArray[np.float32]]]] = []
+        total = 0
+        while self._pending:
+            texts, future = self._pending[0]
+            if batch and total + len(texts) > self._max_texts:
+                break
+            self._pending.pop(0)
+            # Callers cancelled while queued need no embeddings.
+            if future.cancelled():
+                continue
+            batch.append((texts, future))
+            total += len(texts)
+        return batch
+
+
+class QueryEmbeddingBatcher(EmbeddingBatcher):
+    """Merge concurrent search queries into shared model invocations.
+
+    Kept apart from the indexing batcher so a query never waits behind a
+    full batch of document chunks; repeated queries are served from cache.
+    """
+
+    def __init__(self, max_texts: int = _MAX_MERGED_QUERIES) -> None:
+        super().__init__(max_texts)
+
+    async def embed_query(self, query: str) -> NDArray[np.float32]:
+        return (await self.embed([query]))[0]
+
+    def _encode(self, texts: list[str]) -> NDArray[np.float32]:
+        return embed_queries(texts)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import copy
 from functools import lru_cache
 from typing import TYPE_CHECKING
 
@@ -7,23 +8,57 @@ from mcp_local_rag.config import CHUNK_OVERLAP, CHUNK_SIZE, EMBEDDING_MODEL
 
 if TYPE_CHECKING:
     from semantic_text_splitter import TextSplitter
+    from tokenizers import Tokenizer
+
+
+def _get_tokenizer() -> Tokenizer:
+    """Return a tokenizer for EMBEDDING_MODEL, reusing the embedding model's.
+
+    The embedding model is always loaded before chunking, and it already
+    holds the same tokenizer, so copying it avoids a second load from the
+    HuggingFace Hub. The copy has truncation and padding disabled: the model
+    truncates to its max sequence length at encode time, which would
+    otherwise cap the splitter's token counts.
+    """
+    from tokenizers import Tokenizer as _Tokenizer  # noqa: PLC0415
+
+    from mcp_local_rag.processing.embeddings import get_embedding_model  # noqa: PLC0415
+
+    backend = getattr(get_embedding_model().tokenizer, "backend_tokenizer", None)
+    if not isinstance(backend, _Tokenizer):
+        # Slow (non-Rust) tokenizer: nothing to share.
+        return _Tokenizer.from_pretrained(EMBEDDING_MODEL)  # pyright: ignore[reportUnknownMemberType]
+
+    tokenizer = copy.deepcopy(backend)
+    tokenizer.no_truncation()
+    tokenizer.no_padding()
+    return tokenizer
 
 
 @lru_cache(maxsize=1)
 def _get_splitter() -> TextSplitter:
-    # Deferred imports: tokenizers downloads a HuggingFace tokenizer on first call
-    # (~3s). Keeping them here avoids blocking process startup.
+    # Deferred import: keeps semantic_text_splitter off the startup path.
     from semantic_text_splitter import TextSplitter as _TS  # noqa: PLC0415
-    from tokenizers import Tokenizer  # noqa: PLC0415
 
     return _TS.from_huggingface_tokenizer(  # pyright: ignore[reportUnknownMemberType]
-        tokenizer=Tokenizer.from_pretrained(EMBEDDING_MODEL),  # pyright: ignore[reportUnknownArgumentType, reportUnknownMemberType]
+        tokenizer=_get_tokenizer(),  # pyright: ignore[reportUnknownArgumentType]
         capacity=(CHUNK_SIZE - CHUNK_OVERLAP, CHUNK_SIZE),
         overlap=CHUNK_OVERLAP,
     )
 
 
+def preload_splitter() -> None:
+    """Build the text splitter ahead of the first chunk_text call."""
+    _get_splitter()
+
+
 def chunk_text(text: str) -> list[str]:
-    if not text.strip():
+    stripped = text.strip()
+    if not stripped:
         return []
-    return _get_splitter().chunks(text)
+    # Every token covers at least one UTF-8 byte (WordPiece and byte-level BPE
+    # alike), so text shorter than CHUNK_SIZE bytes always fits in one chunk
+    # and the tokenizer pass can be skipped.
+    if len(stripped) < CHUNK_SIZE and len(stripped.encode("utf-8")) < CHUNK_SIZE:
+        return [stripped]
+    return _get_splitter().chunks(stripped)
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
+from collections import OrderedDict
 from functools import lru_cache
+import threading
 from typing import TYPE_CHECKING
 
 import numpy as np
 from numpy.typing import NDArray
 
-from mcp_local_rag.config import EMBEDDING_MODEL
+from mcp_local_rag.config import EMBED_BATCH_SIZE, EMBEDDING_MODEL
 
 if TYPE_CHECKING:
     from sentence_transformers import SentenceTransformer
@@ -19,22 +21,55 @@ def get_embedding_model() -> SentenceTransformer:
     # the model only loads when embed_texts/embed_query is first called.
     from sentence_transformers import SentenceTransformer as _ST  # noqa: PLC0415
 
-    return _ST(EMBEDDING_MODEL)
+    model = _ST(EMBEDDING_MODEL)
+    if model.device.type == "cuda":
+        # FP16 halves memory traffic on GPU with negligible quality loss.
+        model.half()
+    return model
 
 
 def embed_texts(texts: list[str]) -> NDArray[np.float32]:
     model = get_embedding_model()
     embeddings: NDArray[np.float32] = model.encode(  # pyright: ignore[reportUnknownMemberType]
         texts,
+        batch_size=EMBED_BATCH_SIZE,
         convert_to_numpy=True,
         show_progress_bar=False,
         normalize_embeddings=True,
     )
-    return embeddings
+    return embeddings.astype(np.float32, copy=False)
+
+
+_QUERY_CACHE_SIZE = 2048
+_query_cache: OrderedDict[str, NDArray[np.float32]] = OrderedDict()
+_query_cache_lock = threading.Lock()
+
+
+def embed_queries(queries: list[str]) -> NDArray[np.float32]:
+    # Cached: interactive search repeats queries often, and a hit skips the
+    # model forward pass entirely. Only the misses are encoded, together.
+    # Whitespace is normalized (the tokenizer ignores it anyway) so trivially
+    # different spellings share an entry; case is kept for cased models.
+    queries = [" ".join(q.split()) for q in queries]
+    found: dict[str, NDArray[np.float32]] = {}
+    with _query_cache_lock:
+        for query in queries:
+            if query in _query_cache:
+                _query_cache.move_to_end(query)
+                found[query] = _query_cache[query]
+    missing = list(dict.fromkeys(q for q in queries if q not in found))
+    if missing:
+        embeddings = embed_texts(missing)
+        with _query_cache_lock:
+            for query, embedding in zip(missing, embeddings, strict=True):
+                found[query] = _query_cache[query] = embedding
+            while len(_query_cache) > _QUERY_CACHE_SIZE:
+                _query_cache.popitem(last=False)
+    return np.stack([found[q] for q in queries])
 
 
 def embed_query(query: str) -> NDArray[np.float32]:
-    return embed_texts([query])[0]
+    return embed_queries([query])[0]
 
 
 def get_embedding_dimension() -> int | None:
@@ -4,27 +4,35 @@ import asyncio
 from collections import defaultdict
 import hashlib
 import logging
+import mmap
+import os
+import random
 from datetime import datetime, timezone
 from email.utils import parsedate_to_datetime
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import TYPE_CHECKING, Literal, cast
-
-import pymupdf  # type: ignore[import-untyped]
-import pymupdf.layout  # pyright: ignore[reportUnusedImport]
-import pymupdf4llm  # type: ignore[import-untyped]
-from pymupdf4llm.helpers.check_ocr import should_ocr_page  # pyright: ignore[reportMissingTypeStubs, reportUnknownVariableType]
+from typing import TYPE_CHECKING, Any, Literal, TypeVar, cast
 
 from mcp_local_rag.config import (
     AZURE_DI_SUPPORTED_EXTENSIONS,
+    GEMINI_FAILURE_FALLBACK,
+    GEMINI_MAX_RETRIES,
     GEMINI_MODEL,
+    GEMINI_PAGES_PER_REQUEST,
+    GEMINI_PDF_MEDIA_RESOLUTION,
     GEMINI_SUPPORTED_EXTENSIONS,
     IMAGE_MIME_TYPES,
+    MAX_CONCURRENT_GEMINI,
     PYMUPDF_SUPPORTED_EXTENSIONS,
     SUPPORTED_EXTENSIONS,
+    SUPPORTED_SUFFIXES,
 )
 
 if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    import pymupdf  # type: ignore[import-untyped]
     from google import genai
     from google.genai import errors
     from google.genai.types import MediaResolution
@@ -36,12 +44,16 @@ if TYPE_CHECKING:
         DocumentTableCell,
     )
 
+    from mcp_local_rag.processing.ratelimit import RateLimiter
     from mcp_local_rag.storage.metadata import MetadataStore
 
 logger = logging.getLogger("mcp_local_rag.processing.extractors")
 
 ExtractionMethod = Literal["auto", "azure", "gemini", "pymupdf"]
 
+_T = TypeVar("_T")
+
+
 @dataclass
 class ExtractedDocument:
     file_path: str
@@ -58,85 +70,231 @@ _PROVIDER_SUPPORTED_EXTENSIONS: dict[str, set[str]] = {
 }
 
 
+_default_gemini_semaphore: (
+    tuple[asyncio.AbstractEventLoop, asyncio.Semaphore] | None
+) = None
+
+
+def _get_default_gemini_semaphore() -> asyncio.Semaphore:
+    """Return the process-wide Gemini limiter for callers that don't pass one.
+
+    Shared so that concurrent extractions are limited together rather than
+    each getting its own budget. Rebuilt when the running loop changes,
+    since a semaphore is bound to the loop it is first used on.
+    """
+    global _default_gemini_semaphore
+    loop = asyncio.get_running_loop()
+    if _default_gemini_semaphore is None or _default_gemini_semaphore[0] is not loop:
+        _default_gemini_semaphore = (loop, asyncio.Semaphore(MAX_CONCURRENT_GEMINI))
+    return _default_gemini_semaphore[1]
+
+
 def provider_supports_file(provider: str, suffix: str) -> bool:
     extensions = _PROVIDER_SUPPORTED_EXTENSIONS.get(provider)
     return extensions is not None and suffix in extensions
 
 
+# Files at least this large are hashed through an mmap instead of buffered reads.
+_MMAP_HASH_THRESHOLD = 1 << 20
+
+
 def compute_file_hash(file_path: Path) -> str:
-    with open(file_path, "rb") as f:
-        return hashlib.file_digest(f, "sha256").hexdigest()
+    # Memoized on the stat signature (as git's index does), so a file that is
+    # hashed by the indexer's change check and again by its extractor is read
+    # only once while its size and mtime stay the same.
+    st = os.stat(file_path)
+    return _hash_file(str(file_path), st.st_size, st.st_mtime_ns)
+
+
+@lru_cache(maxsize=1024)
+def _hash_file(path: str, size: int, mtime_ns: int) -> str:
+    del mtime_ns  # cache key only
+    with open(path, "rb") as f:
+        if size < _MMAP_HASH_THRESHOLD:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        # A single contiguous buffer lets OpenSSL hash the whole file in one
+        # call rather than through file_digest's small-read loop.
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return hashlib.sha256(mm).hexdigest()
+
+
+def _path_str(file_path: Path) -> str:
+    # The indexer hands extractors an already-resolved path, so only relative
+    # paths are worth a resolve() (one lstat per path component).
+    return str(file_path if file_path.is_absolute() else file_path.resolve())
 
 
 def get_file_mtime(file_path: Path) -> float:
     return file_path.stat().st_mtime
 
 
-def _get_pdf_page_count(file_path: Path) -> int:
-    doc = pymupdf.open(str(file_path))
-    page_count: int = len(doc)
-    doc.close()
-    return page_count
+@lru_cache(maxsize=1)
+def _pymupdf4llm():  # pyright: ignore[reportReturnType]
+    # Deferred: pymupdf and its layout engine take about a second to import,
+    # which every server start paid even if no PDF was ever indexed. The
+    # layout import must come first so pymupdf4llm picks it up.
+    import pymupdf.layout  # noqa: PLC0415  # pyright: ignore[reportUnusedImport]
+    import pymupdf4llm as _m  # type: ignore[import-untyped]  # noqa: PLC0415
 
+    return _m
 
-def _pymupdf_to_markdown(
-    file_path: Path,
-    pages: list[int] | None = None,
-) -> str:
-    content: str = pymupdf4llm.to_markdown(  # type: ignore[assignment]
-        doc=str(file_path),
-        pages=pages,
+
+def _should_ocr_page() -> Callable[[pymupdf.Page], dict[str, object]]:
+    _pymupdf4llm()
+    from pymupdf4llm.helpers.check_ocr import should_ocr_page  # pyright: ignore[reportMissingTypeStubs, reportUnknownVariableType]  # noqa: PLC0415
+
+    # Its signature is only partially typed; callers rely on the page mapping.
+    return cast("Callable[[pymupdf.Page], dict[str, object]]", should_ocr_page)
+
+
+def _pymupdf_to_markdown(doc: pymupdf.Document) -> str:
+    content: str = _pymupdf4llm().to_markdown(  # type: ignore[assignment]
+        doc=doc,
         use_ocr=False,
     )
     return content
 
 
-def _convert_pdf_page_to_bytes(
-    file_path: Path,
-    page_index: int,
+def _pymupdf_pages_to_markdown(
+    doc: pymupdf.Document,
+    pages: list[int],
+) -> list[str]:
+    """Convert several pages of an open document in a single pymupdf4llm pass.
+
+    Returns one Markdown string per entry of ``pages`` (which must be sorted
+    and unique, matching pymupdf4llm's own page ordering).
+    """
+    chunks: list[dict[str, object]] = _pymupdf4llm().to_markdown(  # type: ignore[assignment]
+        doc=doc,
+        pages=pages,
+        page_chunks=True,
+        use_ocr=False,
+    )
+    return [str(chunk["text"]) for chunk in chunks]
+
+
+def _convert_pdf_pages_to_bytes(
+    src_doc: pymupdf.Document,
+    first_page: int,
+    last_page: int,
 ) -> bytes:
-    doc = pymupdf.open(str(file_path))
-    single_page_doc: pymupdf.Document = pymupdf.open()
+    import pymupdf  # noqa: PLC0415
+
+    pages_doc: pymupdf.Document = pymupdf.open()
     try:
-        single_page_doc.insert_pdf(doc, from_page=page_index, to_page=page_index)  # pyright: ignore[reportUnknownMemberType]
-        pdf_bytes = single_page_doc.tobytes()  # pyright: ignore[reportUnknownMemberType]
+        pages_doc.insert_pdf(src_doc, from_page=first_page, to_page=last_page)  # pyright: ignore[reportUnknownMemberType]
+        pdf_bytes = pages_doc.tobytes()  # pyright: ignore[reportUnknownMemberType]
     finally:
-        single_page_doc.close()
-        doc.close()
+        pages_doc.close()
 
     return pdf_bytes
 
 
-async def _gemini_ocr_pdf_page(
+_GEMINI_PAGE_BREAK = "<<<PAGE_BREAK>>>"
+
+
+def _batch_page_indices(page_indices: list[int], batch_size: int) -> list[list[int]]:
+    """Group sorted page indices into runs of consecutive pages, at most
+    ``batch_size`` long, so each run can be sent as one PDF slice."""
+    batches: list[list[int]] = []
+    for page_index in page_indices:
+        if (
+            batches
+            and len(batches[-1]) < batch_size
+            and batches[-1][-1] == page_index - 1
+        ):
+            batches[-1].append(page_index)
+        else:
+            batches.append([page_index])
+    return batches
+
+
+async def _wait_uninterrupted(aws: Iterable[asyncio.Future[Any]]) -> None:
+    """Wait for every awaitable to finish, then re-raise any cancellation."""
+    pending = set(aws)
+    cancelled = False
+    while pending:
+        try:
+            _, pending = await asyncio.wait(pending)
+        except asyncio.CancelledError:
+            cancelled = True
+    if cancelled:
+        raise asyncio.CancelledError
+
+
+async def _to_thread_to_completion(
+    func: Callable[..., _T], /, *args: Any, **kwargs: Any
+) -> _T:
+    """``asyncio.to_thread`` that, when cancelled, still waits for ``func``.
+
+    A worker thread cannot be interrupted, and plain ``to_thread`` returns
+    control on cancellation while it keeps running. Work on the shared
+    PyMuPDF document goes through here so no lock is released and the
+    document is not closed while a thread still uses it.
+    """
+    future = asyncio.ensure_future(asyncio.to_thread(func, *args, **kwargs))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        await _wait_uninterrupted([future])
+        raise
+
+
+class _PageSplitError(Exception):
+    """A multi-page Gemini reply could not be split back into its pages."""
+
+
+async def _gemini_ocr_pdf_pages(
     file_path: Path,
-    page_index: int,
+    src_doc: pymupdf.Document,
+    doc_lock: asyncio.Lock,
+    page_indices: list[int],
     gemini_client: genai.Client,
     media_resolution: MediaResolution | None = None,
-) -> str:
-    import aiofiles  # noqa: PLC0415
+    rate_limiter: RateLimiter | None = None,
+) -> list[str]:
+    """OCR a run of consecutive pages in one request; one Markdown string per page."""
     from google.genai import types as _types  # noqa: PLC0415
     from google.genai.types import MediaResolution as _MR  # noqa: PLC0415
 
     if media_resolution is None:
-        media_resolution = _MR.MEDIA_RESOLUTION_MEDIUM
+        media_resolution = _MR(
+            f"MEDIA_RESOLUTION_{GEMINI_PDF_MEDIA_RESOLUTION.upper()}"
+        )
 
-    pdf_bytes = await asyncio.to_thread(
-        _convert_pdf_page_to_bytes,
-        file_path=file_path,
-        page_index=page_index,
-    )
+    # The source Document is shared by every page of the extraction and
+    # PyMuPDF documents are not thread-safe, so serialize access to it.
+    async with doc_lock:
+        pdf_bytes = await _to_thread_to_completion(
+            _convert_pdf_pages_to_bytes,
+            src_doc=src_doc,
+            first_page=page_indices[0],
+            last_page=page_indices[-1],
+        )
 
+    if len(page_indices) == 1:
+        prompt = (
+            "Convert this PDF page to Markdown. "
+            "Preserve headings, lists, tables, and formatting. "
+            "Return only the Markdown content."
+        )
+    else:
+        prompt = (
+            f"Convert each of the {len(page_indices)} pages of this PDF to Markdown. "
+            "Preserve headings, lists, tables, and formatting. "
+            f"Separate consecutive pages with a line containing only {_GEMINI_PAGE_BREAK} "
+            "and do not use that marker anywhere else. "
+            "Return only the Markdown content."
+        )
+
+    # Paced per request, so the page-by-page fallback below is paced too.
+    if rate_limiter is not None:
+        await rate_limiter.acquire()
     response = await gemini_client.aio.models.generate_content(  # pyright: ignore[reportUnknownMemberType]
         model=GEMINI_MODEL,
         contents=[
             _types.Part.from_bytes(data=pdf_bytes, mime_type="application/pdf"),
-            _types.Part.from_text(
-                text=(
-                    "Convert this PDF page to Markdown. "
-                    "Preserve headings, lists, tables, and formatting. "
-                    "Return only the Markdown content."
-                )
-            ),
+            _types.Part.from_text(text=prompt),
         ],
         config=_types.GenerateContentConfig(media_resolution=media_resolution),
     )
@@ -145,7 +303,25 @@ async def _gemini_ocr_pdf_page(
     if response_text is None:
         raise RuntimeError("Gemini OCR response contained no text.")
 
-    return response_text
+    if len(page_indices) == 1:
+        return [response_text]
+
+    pages = [page.strip() for page in response_text.split(_GEMINI_PAGE_BREAK)]
+    if len(pages) == len(page_indices):
+        return pages
+
+    # The model did not follow the page-break contract; the pages cannot be
+    # attributed reliably, so the caller falls back to one request per page.
+    logger.warning(
+        "[%s] pages %d-%d: Gemini returned %d page(s) for a %d-page request, "
+        "retrying page by page",
+        file_path.name,
+        page_indices[0] + 1,
+        page_indices[-1] + 1,
+        len(pages),
+        len(page_indices),
+    )
+    raise _PageSplitError
 
 
 def _get_retry_after_seconds(error: errors.ClientError) -> float:
@@ -162,75 +338,124 @@ def _get_retry_after_seconds(error: errors.ClientError) -> float:
         raise error
 
     retry_after = retry_after.strip()
-    if retry_after.isdigit():
+    # Delay-seconds is the common form; isascii() keeps float() from seeing
+    # Unicode digits that isdigit() alone would accept.
+    if retry_after.isascii() and retry_after.isdigit():
         return float(retry_after)
 
-    retry_at = cast(datetime, parsedate_to_datetime(retry_after))
+    try:
+        retry_at = cast(datetime, parsedate_to_datetime(retry_after))
+    except (TypeError, ValueError):
+        raise error from None
     if retry_at.tzinfo is None:
         retry_at = retry_at.replace(tzinfo=timezone.utc)
 
     return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
 
 
-async def _gemini_ocr_pdf_page_with_retry(
+_GEMINI_BACKOFF_BASE = 1.0
+_GEMINI_BACKOFF_CAP = 60.0
+
+
+def _gemini_retry_delay(error: errors.APIError, attempt: int) -> float:
+    """Seconds to wait before retrying ``error``; re-raises it if not retryable.
+
+    Rate limits (429) and server errors (5xx) back off exponentially with
+    jitter, so pages that failed together do not retry in lockstep; a 429's
+    ``Retry-After`` is honoured as a floor. Other client errors fail fast.
+    """
+    from google.genai import errors as _errors  # noqa: PLC0415
+
+    floor = 0.0
+    if isinstance(error, _errors.ClientError) and error.code == 429:
+        try:
+            floor = _get_retry_after_seconds(error)
+        except _errors.APIError:
+            pass  # no usable Retry-After; rely on backoff alone
+    elif not isinstance(error, _errors.ServerError):
+        raise error
+
+    backoff = min(_GEMINI_BACKOFF_CAP, _GEMINI_BACKOFF_BASE * 2**attempt)
+    return max(floor, backoff * random.uniform(0.5, 1.5))
+
+
+async def _gemini_ocr_pdf_pages_with_retry(
     file_path: Path,
-    page_index: int,
+    src_doc: pymupdf.Document,
+    doc_lock: asyncio.Lock,
+    page_indices: list[int],
     gemini_client: genai.Client,
     semaphore: asyncio.Semaphore,
-    max_retries: int = 2,
-) -> str:
+    rate_limiter: RateLimiter | None = None,
+    max_retries: int = GEMINI_MAX_RETRIES,
+) -> list[str]:
     from google.genai import errors as _errors  # noqa: PLC0415
 
+    waited = 0.0
     for attempt in range(max_retries + 1):
         try:
             async with semaphore:
-                return await _gemini_ocr_pdf_page(
+                return await _gemini_ocr_pdf_pages(
                     file_path=file_path,
-                    page_index=page_index,
+                    src_doc=src_doc,
+                    doc_lock=doc_lock,
+                    page_indices=page_indices,
                     gemini_client=gemini_client,
+                    rate_limiter=rate_limiter,
                 )
-        except _errors.ClientError as err:
-            if err.code != 429 or attempt >= max_retries:
+        except _PageSplitError:
+            # Outside the semaphore slot: each page takes its own slot and
+            # retry budget, so a failure on one page never resends the batch
+            # or the pages that already succeeded.
+            page_results = await asyncio.gather(
+                *(
+                    _gemini_ocr_pdf_pages_with_retry(
+                        file_path=file_path,
+                        src_doc=src_doc,
+                        doc_lock=doc_lock,
+                        page_indices=[page_index],
+                        gemini_client=gemini_client,
+                        semaphore=semaphore,
+                        rate_limiter=rate_limiter,
+                        max_retries=max_retries,
+                    )
+                    for page_index in page_indices
+                ),
+                return_exceptions=True,
+            )
+            pages: list[str] = []
+            for result in page_results:
+                if isinstance(result, BaseException):
+                    raise result
+                pages.extend(result)
+            return pages
+        except _errors.APIError as err:
+            if attempt >= max_retries:
                 raise
 
-            retry_after = _get_retry_after_seconds(err)
+            delay = _gemini_retry_delay(err, attempt)
+            waited += delay
             logger.warning(
-                "[%s] page %d: Gemini 429 rate-limited, Retry-After=%.1fs — sleeping (attempt %d/%d)",
+                "[%s] page %d: Gemini error %d, retrying in %.1fs (attempt %d/%d, %.1fs waited)",
                 file_path.name,
-                page_index + 1,
-                retry_after,
+                page_indices[0] + 1,
+                err.code,
+                delay,
                 attempt + 1,
                 max_retries,
+                waited,
             )
-            await asyncio.sleep(retry_after)
+            await asyncio.sleep(delay)
 
     raise RuntimeError("Gemini OCR retries exhausted.")
 
 
-async def _convert_and_cache_gemini_page(
-    file_path: Path,
-    page_index: int,
-    file_hash: str,
-    gemini_client: genai.Client,
-    semaphore: asyncio.Semaphore,
-    metadata_store: MetadataStore,
-) -> str:
-    """Run Gemini OCR for a single page and cache the result on success."""
-    result = await _gemini_ocr_pdf_page_with_retry(
-        file_path=file_path,
-        page_index=page_index,
-        gemini_client=gemini_client,
-        semaphore=semaphore,
-    )
-    metadata_store.cache_page(file_hash, page_index, result)
-    return result
-
-
 async def _gemini_extract_image(
     file_path: Path,
     gemini_client: genai.Client,
     semaphore: asyncio.Semaphore,
-    max_retries: int = 2,
+    rate_limiter: RateLimiter | None = None,
+    max_retries: int = GEMINI_MAX_RETRIES,
 ) -> str:
     """Extract text and describe visual content from an image using Gemini."""
     import aiofiles  # noqa: PLC0415
@@ -244,9 +469,12 @@ async def _gemini_extract_image(
     async with aiofiles.open(file_path, "rb") as f:
         image_bytes = await f.read()
 
+    waited = 0.0
     for attempt in range(max_retries + 1):
         try:
             async with semaphore:
+                if rate_limiter is not None:
+                    await rate_limiter.acquire()
                 response = await gemini_client.aio.models.generate_content(  # pyright: ignore[reportUnknownMemberType]
                     model=GEMINI_MODEL,
                     contents=[
@@ -265,19 +493,22 @@ async def _gemini_extract_image(
                         media_resolution=_MR.MEDIA_RESOLUTION_HIGH,
                     ),
                 )
-        except _errors.ClientError as err:
-            if err.code != 429 or attempt >= max_retries:
+        except _errors.APIError as err:
+            if attempt >= max_retries:
                 raise
 
-            retry_after = _get_retry_after_seconds(err)
+            delay = _gemini_retry_delay(err, attempt)
+            waited += delay
             logger.warning(
-                "[%s] Gemini 429 rate-limited, Retry-After=%.1fs — sleeping (attempt %d/%d)",
+                "[%s] Gemini error %d, retrying in %.1fs (attempt %d/%d, %.1fs waited)",
                 file_path.name,
-                retry_after,
+                err.code,
+                delay,
                 attempt + 1,
                 max_retries,
+                waited,
             )
-            await asyncio.sleep(retry_after)
+            await asyncio.sleep(delay)
             continue
 
         response_text = response.text
@@ -288,14 +519,6 @@ async def _gemini_extract_image(
     raise RuntimeError("Gemini image extraction retries exhausted.")
 
 
-def _needs_html_table(table: DocumentTable) -> bool:
-    """Return True if any cell spans multiple rows or columns."""
-    for cell in table.cells:
-        if (cell.row_span or 1) > 1 or (cell.column_span or 1) > 1:
-            return True
-    return False
-
-
 def _build_html_table(table: DocumentTable) -> str:
     """Render the table as an HTML table to support colspan/rowspan."""
     # Track which (row, col) positions are already occupied by a spanning cell.
@@ -357,18 +580,20 @@ def _build_markdown_table(table: DocumentTable) -> str:
     standard Markdown tables don't support them. Falls back to a plain
     Markdown table otherwise.
     """
-    if _needs_html_table(table):
-        return _build_html_table(table)
-
     row_count: int = table.row_count
     col_count: int = table.column_count
 
-    grid: list[list[str]] = [["" for _ in range(col_count)] for _ in range(row_count)]
+    # Flat row-major grid: one allocation instead of a list per row.
+    grid: list[str] = [""] * (row_count * col_count)
     header_rows: set[int] = set()
 
     for cell in table.cells:
+        # Span detection is fused into the fill loop so the common no-span
+        # case walks the cells only once.
+        if (cell.row_span or 1) > 1 or (cell.column_span or 1) > 1:
+            return _build_html_table(table)
         r, c = cell.row_index, cell.column_index
-        grid[r][c] = cell.content.replace("\n", " ").strip()
+        grid[r * col_count + c] = cell.content.replace("\n", " ").strip()
         kind = cell.kind or "content"
         if kind in ("columnHeader", "rowHeader", "stubHead"):
             header_rows.add(r)
@@ -379,7 +604,8 @@ def _build_markdown_table(table: DocumentTable) -> str:
     if table.caption:
         lines.append(f"**{table.caption.content.strip()}**")
         lines.append("")
-    for r_idx, row in enumerate(grid):
+    for r_idx in range(row_count):
+        row = grid[r_idx * col_count : (r_idx + 1) * col_count]
         lines.append("| " + " | ".join(row) + " |")
         if r_idx == separator_after:
             lines.append("| " + " | ".join(["---"] * col_count) + " |")
@@ -394,8 +620,8 @@ def _rebuild_content_tables(result: AnalyzeResult) -> str:
     """Replace each table block in ``result.content`` with a reconstructed
     Markdown table built from the structured ``result.tables`` cell data.
 
-    Replacements are applied right-to-left so earlier span offsets remain
-    valid throughout the substitution loop.
+    The output is assembled in a single left-to-right pass over the original
+    content, so the cost is linear in its length regardless of table count.
     """
     content: str = result.content
     if not result.tables:
@@ -410,10 +636,15 @@ def _rebuild_content_tables(result: AnalyzeResult) -> str:
             (span.offset, span.offset + span.length, _build_markdown_table(table))
         )
 
-    for start, end, md in sorted(replacements, key=lambda x: x[0], reverse=True):
-        content = content[:start] + md + content[end:]
+    parts: list[str] = []
+    cursor = 0
+    for start, end, md in sorted(replacements, key=lambda x: x[0]):
+        parts.append(content[cursor:start])
+        parts.append(md)
+        cursor = end
+    parts.append(content[cursor:])
 
-    return content
+    return "".join(parts)
 
 
 async def _azure_extract_document(
@@ -446,12 +677,102 @@ async def _azure_extract_document(
     return _rebuild_content_tables(result)
 
 
+@dataclass
+class _PdfPagePlan:
+    """Per-page routing decided before any Gemini request is issued.
+
+    ``pages`` holds the final Markdown for cached and pymupdf pages and an
+    empty placeholder at each index listed in ``gemini_indices``.
+    """
+
+    pages: list[str]
+    gemini_indices: list[int]
+    cached_page_count: int
+    pymupdf_page_count: int
+
+
+def _plan_pdf_pages(
+    doc: pymupdf.Document,
+    file_path: Path,
+    file_hash: str,
+    page_count: int,
+    metadata_store: MetadataStore,
+    extraction_method: ExtractionMethod,
+    gemini_available: bool,
+) -> _PdfPagePlan:
+    """Resolve cached pages, route the rest, and convert pymupdf pages.
+
+    Synchronous; run in a worker thread.
+    """
+    pages: list[str] = [""] * page_count
+    gemini_indices: list[int] = []
+    pymupdf_indices: list[int] = []
+    cached_page_count = 0
+    # One query for the whole file instead of one lookup per page.
+    cached_pages = metadata_store.get_cached_pages(file_hash)
+    # Per-page lines are DEBUG; the INFO summary in extract_pdf covers the
+    # counts. Checked once so filtered runs skip the logging call per page.
+    log_pages = logger.isEnabledFor(logging.DEBUG)
+
+    for page_index, page in enumerate(doc.pages()):  # pyright: ignore[reportUnknownMemberType, reportUnknownArgumentType, reportUnknownVariableType]
+        cached = cached_pages.get(page_index)
+        if cached is not None:
+            if log_pages:
+                logger.debug(
+                    "[%s]   [%d/%d] cached",
+                    file_path.name,
+                    page_index + 1,
+                    page_count,
+                )
+            pages[page_index] = cached
+            cached_page_count += 1
+            continue
+
+        use_gemini = False
+        if extraction_method == "gemini":
+            use_gemini = gemini_available
+        elif extraction_method == "auto":
+            use_gemini = gemini_available and bool(
+                _should_ocr_page()(page)["should_ocr"]  # pyright: ignore[reportUnknownArgumentType]
+            )
+        # extraction_method == "pymupdf" → use_gemini stays False
+
+        if log_pages:
+            logger.debug(
+                "[%s]   [%d/%d] %s",
+                file_path.name,
+                page_index + 1,
+                page_count,
+                "Gemini OCR" if use_gemini else "pymupdf",
+            )
+        if use_gemini:
+            gemini_indices.append(page_index)
+        else:
+            pymupdf_indices.append(page_index)
+
+    # One pymupdf4llm call over the already-open document instead of
+    # re-opening and re-parsing the PDF once per page.
+    if pymupdf_indices:
+        page_mds = _pymupdf_pages_to_markdown(doc, pymupdf_indices)
+        for page_index, page_md in zip(pymupdf_indices, page_mds, strict=True):
+            pages[page_index] = page_md
+        metadata_store.cache_pages(file_hash, list(zip(pymupdf_indices, page_mds)))
+
+    return _PdfPagePlan(
+        pages=pages,
+        gemini_indices=gemini_indices,
+        cached_page_count=cached_page_count,
+        pymupdf_page_count=len(pymupdf_indices),
+    )
+
+
 async def extract_pdf(
     file_path: Path,
     metadata_store: MetadataStore,
     azure_di_client: DocumentIntelligenceClient | None = None,
     gemini_client: genai.Client | None = None,
     gemini_semaphore: asyncio.Semaphore | None = None,
+    gemini_rate_limiter: RateLimiter | None = None,
     force: bool = False,
     extraction_method: ExtractionMethod = "auto",
 ) -> ExtractedDocument:
@@ -460,7 +781,39 @@ async def extract_pdf(
     if force:
         metadata_store.clear_page_cache(file_hash)
 
-    page_count = await asyncio.to_thread(_get_pdf_page_count, file_path)
+    # Opened once: the page-count probe, the pymupdf conversion and every
+    # Gemini page task share this handle, so the xref is parsed only once.
+    import pymupdf  # noqa: PLC0415
+
+    doc = await asyncio.to_thread(pymupdf.open, str(file_path))
+    try:
+        return await _extract_pdf_doc(
+            doc,
+            file_path=file_path,
+            file_hash=file_hash,
+            metadata_store=metadata_store,
+            azure_di_client=azure_di_client,
+            gemini_client=gemini_client,
+            gemini_semaphore=gemini_semaphore,
+            gemini_rate_limiter=gemini_rate_limiter,
+            extraction_method=extraction_method,
+        )
+    finally:
+        doc.close()
+
+
+async def _extract_pdf_doc(
+    doc: pymupdf.Document,
+    file_path: Path,
+    file_hash: str,
+    metadata_store: MetadataStore,
+    azure_di_client: DocumentIntelligenceClient | None,
+    gemini_client: genai.Client | None,
+    gemini_semaphore: asyncio.Semaphore | None,
+    gemini_rate_limiter: RateLimiter | None,
+    extraction_method: ExtractionMethod,
+) -> ExtractedDocument:
+    page_count = len(doc)
 
     logger.info(
         "[%s] Extracting PDF (%d pages, method=%s)",
@@ -487,7 +840,7 @@ async def extract_pdf(
             page_count,
         )
         return ExtractedDocument(
-            file_path=str(file_path.resolve()),
+            file_path=_path_str(file_path),
             file_hash=file_hash,
             content=content,
             file_type="pdf",
@@ -497,14 +850,14 @@ async def extract_pdf(
     # Fast path: pymupdf-only needs no per-page iteration
     if extraction_method == "pymupdf":
         logger.info("[%s] Converting entire document with pymupdf", file_path.name)
-        content: str = await asyncio.to_thread(_pymupdf_to_markdown, file_path)
+        content: str = await _to_thread_to_completion(_pymupdf_to_markdown, doc)
         logger.info(
             "[%s] Extraction complete: %d pages (all pymupdf)",
             file_path.name,
             page_count,
         )
         return ExtractedDocument(
-            file_path=str(file_path.resolve()),
+            file_path=_path_str(file_path),
             file_hash=file_hash,
             content=content,
             file_type="pdf",
@@ -516,117 +869,112 @@ async def extract_pdf(
             "extraction_method='gemini' requires GEMINI_API_KEY to be set."
         )
 
-    semaphore = gemini_semaphore or asyncio.Semaphore(16)
-
-    gemini_page_count = 0
-    pymupdf_page_count = 0
-    cached_page_count = 0
-    md_pages: list[str | asyncio.Task[str]] = []
+    semaphore = gemini_semaphore or _get_default_gemini_semaphore()
 
-    doc = pymupdf.open(str(file_path))
-    for page_index, page in enumerate(doc.pages()):  # pyright: ignore[reportUnknownMemberType, reportUnknownArgumentType, reportUnknownVariableType]
-        cached = metadata_store.get_cached_page(file_hash, page_index)
-        if cached is not None:
-            logger.info(
-                "[%s]   [%d/%d] cached",
-                file_path.name,
-                page_index + 1,
-                page_count,
-            )
-            md_pages.append(cached)
-            cached_page_count += 1
-            continue
-
-        use_gemini = False
-        if extraction_method == "gemini":
-            use_gemini = gemini_client is not None
-        elif extraction_method == "auto":
-            use_gemini = (
-                gemini_client is not None and should_ocr_page(page)["should_ocr"]  # pyright: ignore[reportUnknownArgumentType]
-            )
-        # extraction_method == "pymupdf" → use_gemini stays False
+    doc_lock = asyncio.Lock()
+    gemini_batches: list[list[int]] = []
+    gemini_tasks: list[asyncio.Task[list[str]]] = []
+    try:
+        # Phase 1 (worker thread): cache lookups, OCR routing and pymupdf
+        # conversion are all CPU/IO-bound and would otherwise block the loop.
+        plan = await _to_thread_to_completion(
+            _plan_pdf_pages,
+            doc,
+            file_path=file_path,
+            file_hash=file_hash,
+            page_count=page_count,
+            metadata_store=metadata_store,
+            extraction_method=extraction_method,
+            gemini_available=gemini_client is not None,
+        )
 
-        if use_gemini:
+        # Phase 2 (event loop): only the Gemini I/O is scheduled here.
+        gemini_batches = _batch_page_indices(
+            plan.gemini_indices, GEMINI_PAGES_PER_REQUEST
+        )
+        if gemini_batches:
             assert gemini_client is not None
-            logger.info(
-                "[%s]   [%d/%d] Gemini OCR",
-                file_path.name,
-                page_index + 1,
-                page_count,
-            )
-            task = asyncio.create_task(
-                _convert_and_cache_gemini_page(
-                    file_path=file_path,
-                    page_index=page_index,
-                    file_hash=file_hash,
-                    gemini_client=gemini_client,
-                    semaphore=semaphore,
-                    metadata_store=metadata_store,
+            gemini_tasks = [
+                asyncio.create_task(
+                    _gemini_ocr_pdf_pages_with_retry(
+                        file_path=file_path,
+                        src_doc=doc,
+                        doc_lock=doc_lock,
+                        page_indices=batch,
+                        gemini_client=gemini_client,
+                        semaphore=semaphore,
+                        rate_limiter=gemini_rate_limiter,
+                    )
                 )
+                for batch in gemini_batches
+            ]
+        task_results = await asyncio.gather(*gemini_tasks, return_exceptions=True)
+    finally:
+        # Gemini tasks read from ``doc``; stop them and wait until they have
+        # finished (including any page conversion thread) before the caller
+        # closes it.
+        for task in gemini_tasks:
+            if not task.done():
+                task.cancel()
+        await _wait_uninterrupted(gemini_tasks)
+        # Cache every page that succeeded in one write, even when other pages
+        # failed or the extraction was cancelled, so a retry resumes from here.
+        succeeded = [
+            (page_index, page_md)
+            for batch, task in zip(gemini_batches, gemini_tasks)
+            if task.done() and not task.cancelled() and task.exception() is None
+            for page_index, page_md in zip(batch, task.result(), strict=True)
+        ]
+        if succeeded:
+            await asyncio.to_thread(metadata_store.cache_pages, file_hash, succeeded)
+
+    md_text = plan.pages
+    failed_indices: list[int] = []
+    for batch, result in zip(gemini_batches, task_results, strict=True):
+        if isinstance(result, BaseException):
+            failed_indices.extend(batch)
+            continue
+        for page_index, page_md in zip(batch, result, strict=True):
+            md_text[page_index] = page_md
+    if failed_indices and GEMINI_FAILURE_FALLBACK == "pymupdf":
+        logger.warning(
+            "[%s] Gemini OCR failed for %d page(s), using the PDF text layer instead: %s",
+            file_path.name,
+            len(failed_indices),
+            ", ".join(str(i + 1) for i in failed_indices),
+        )
+        # Not cached: a forced re-index retries these pages with Gemini.
+        async with doc_lock:
+            fallback_mds = await _to_thread_to_completion(
+                _pymupdf_pages_to_markdown, doc, failed_indices
             )
-            md_pages.append(task)  # pyright: ignore[reportArgumentType]
-            gemini_page_count += 1
-        else:
-            logger.info(
-                "[%s]   [%d/%d] pymupdf",
-                file_path.name,
-                page_index + 1,
-                page_count,
-            )
-            page_md = await asyncio.to_thread(
-                _pymupdf_to_markdown, file_path, [page_index]
-            )
-            metadata_store.cache_page(file_hash, page_index, page_md)
-            md_pages.append(page_md)
-            pymupdf_page_count += 1
-
-    doc.close()
-
-    tasks = [item for item in md_pages if isinstance(item, asyncio.Task)]
-    md_text: list[str] = []
-    if tasks:
-        task_results = await asyncio.gather(*tasks, return_exceptions=True)
-        task_iter = iter(task_results)
-        failed_pages: list[int] = []
-        for page_idx, item in enumerate(md_pages):
-            if isinstance(item, asyncio.Task):
-                result = next(task_iter)
-                if isinstance(result, BaseException):
-                    failed_pages.append(page_idx + 1)
-                    md_text.append("")
-                else:
-                    md_text.append(result)
-            else:
-                md_text.append(item)
-        if failed_pages:
-            page_list = ", ".join(str(p) for p in failed_pages)
-            logger.error(
-                "[%s] Gemini OCR failed for %d page(s): %s",
-                file_path.name,
-                len(failed_pages),
-                page_list,
-            )
-            raise RuntimeError(
-                f"Gemini OCR failed for {len(failed_pages)} page(s) of "
-                f"{file_path.name}: pages {page_list}"
-            )
-    else:
-        for item in md_pages:
-            if isinstance(item, asyncio.Task):
-                raise RuntimeError("Unexpected task while building markdown output.")
-            md_text.append(item)
+        for page_index, page_md in zip(failed_indices, fallback_mds, strict=True):
+            md_text[page_index] = page_md
+        failed_indices = []
+    if failed_indices:
+        page_list = ", ".join(str(i + 1) for i in failed_indices)
+        logger.error(
+            "[%s] Gemini OCR failed for %d page(s): %s",
+            file_path.name,
+            len(failed_indices),
+            page_list,
+        )
+        raise RuntimeError(
+            f"Gemini OCR failed for {len(failed_indices)} page(s) of "
+            f"{file_path.name}: pages {page_list}"
+        )
 
     logger.info(
         "[%s] Extraction complete: %d pages (%d cached, %d Gemini OCR, %d pymupdf)",
         file_path.name,
         page_count,
-        cached_page_count,
-        gemini_page_count,
-        pymupdf_page_count,
+        plan.cached_page_count,
+        len(plan.gemini_indices),
+        plan.pymupdf_page_count,
     )
 
     return ExtractedDocument(
-        file_path=str(file_path.resolve()),
+        file_path=_path_str(file_path),
         file_hash=file_hash,
         content="\n\n".join(md_text),
         file_type="pdf",
@@ -634,16 +982,22 @@ async def extract_pdf(
     )
 
 
-async def extract_docx(file_path: Path) -> ExtractedDocument:
-    from markitdown import MarkItDown  # noqa: PLC0415
+@lru_cache(maxsize=1)
+def _get_markitdown() -> MarkItDown:
+    # Built once: MarkItDown registers all of its converters on construction.
+    from markitdown import MarkItDown as _MarkItDown  # noqa: PLC0415
 
+    return _MarkItDown()
+
+
+async def extract_docx(file_path: Path) -> ExtractedDocument:
     logger.info("[%s] Extracting DOCX (markitdown)", file_path.name)
     file_hash = await asyncio.to_thread(compute_file_hash, file_path)
-    converter = MarkItDown()
+    converter = _get_markitdown()
     result = await asyncio.to_thread(converter.convert, source=file_path)
 
     return ExtractedDocument(
-        file_path=str(file_path.resolve()),
+        file_path=_path_str(file_path),
         file_hash=file_hash,
         content=result.text_content,
         file_type="docx",
@@ -690,24 +1044,29 @@ async def extract_azure_di_document(
     )
 
     return ExtractedDocument(
-        file_path=str(file_path.resolve()),
+        file_path=_path_str(file_path),
         file_hash=file_hash,
         content=content,
         file_type=file_type,
     )
 
 
-async def extract_plaintext(file_path: Path) -> ExtractedDocument:
-    import aiofiles  # noqa: PLC0415
+def _read_text_and_hash(file_path: Path) -> tuple[str, str]:
+    """Hash and decode a text file from a single read."""
+    data = file_path.read_bytes()
+    file_hash = hashlib.sha256(data).hexdigest()
+    # Same result as text-mode open(): UTF-8 with replacement, universal newlines.
+    content = data.decode("utf-8", errors="replace")
+    content = content.replace("\r\n", "\n").replace("\r", "\n")
+    return content, file_hash
 
-    logger.info("[%s] Extracting plaintext", file_path.name)
-    file_hash = await asyncio.to_thread(compute_file_hash, file_path)
 
-    async with aiofiles.open(file_path, "r", encoding="utf-8", errors="replace") as f:
-        content = await f.read()
+async def extract_plaintext(file_path: Path) -> ExtractedDocument:
+    logger.info("[%s] Extracting plaintext", file_path.name)
+    content, file_hash = await asyncio.to_thread(_read_text_and_hash, file_path)
 
     return ExtractedDocument(
-        file_path=str(file_path.resolve()),
+        file_path=_path_str(file_path),
         file_hash=file_hash,
         content=content,
         file_type="plaintext",
@@ -719,6 +1078,7 @@ async def extract_image(
     azure_di_client: DocumentIntelligenceClient | None = None,
     gemini_client: genai.Client | None = None,
     gemini_semaphore: asyncio.Semaphore | None = None,
+    gemini_rate_limiter: RateLimiter | None = None,
     extraction_method: ExtractionMethod = "auto",
 ) -> ExtractedDocument:
     file_hash = await asyncio.to_thread(compute_file_hash, file_path)
@@ -737,9 +1097,9 @@ async def extract_image(
                     raise RuntimeError(
                         "extraction_method='gemini' requires GEMINI_API_KEY to be set."
                     )
-                semaphore = gemini_semaphore or asyncio.Semaphore(16)
+                semaphore = gemini_semaphore or _get_default_gemini_semaphore()
                 content = await _gemini_extract_image(
-                    file_path, gemini_client, semaphore
+                    file_path, gemini_client, semaphore, gemini_rate_limiter
                 )
             case "azure":
                 if azure_di_client is None:
@@ -755,7 +1115,7 @@ async def extract_image(
                 )
 
         return ExtractedDocument(
-            file_path=str(file_path.resolve()),
+            file_path=_path_str(file_path),
             file_hash=file_hash,
             content=content,
             file_type="image",
@@ -763,12 +1123,14 @@ async def extract_image(
         )
 
     if provider_supports_file("gemini", suffix) and gemini_client is not None:
-        semaphore = gemini_semaphore or asyncio.Semaphore(16)
+        semaphore = gemini_semaphore or _get_default_gemini_semaphore()
         logger.info("[%s] Extracting with Gemini", file_path.name)
-        content = await _gemini_extract_image(file_path, gemini_client, semaphore)
+        content = await _gemini_extract_image(
+            file_path, gemini_client, semaphore, gemini_rate_limiter
+        )
         logger.info("[%s] Image extraction complete (Gemini)", file_path.name)
         return ExtractedDocument(
-            file_path=str(file_path.resolve()),
+            file_path=_path_str(file_path),
             file_hash=file_hash,
             content=content,
             file_type="image",
@@ -783,7 +1145,7 @@ async def extract_image(
             file_path.name,
         )
         return ExtractedDocument(
-            file_path=str(file_path.resolve()),
+            file_path=_path_str(file_path),
             file_hash=file_hash,
             content=content,
             file_type="image",
@@ -796,22 +1158,37 @@ async def extract_image(
     )
 
 
+def _lower_suffix(file_path: Path) -> str:
+    """Return ``file_path.suffix.lower()`` without the PurePath.suffix property.
+
+    Called for every path of a directory scan, where the property's overhead
+    is measurable.
+    """
+    return _lower_name_suffix(file_path.name)
+
+
+def _lower_name_suffix(name: str) -> str:
+    i = name.rfind(".")
+    if 0 < i < len(name) - 1:
+        return name[i:].lower()
+    return ""
+
+
 async def extract_document(
     file_path: Path,
     metadata_store: MetadataStore,
     azure_di_client: DocumentIntelligenceClient | None = None,
     gemini_client: genai.Client | None = None,
     gemini_semaphore: asyncio.Semaphore | None = None,
+    gemini_rate_limiter: RateLimiter | None = None,
     force: bool = False,
     extraction_method: ExtractionMethod = "auto",
 ) -> ExtractedDocument:
-    suffix = file_path.suffix.lower()
-
-    if suffix not in SUPPORTED_EXTENSIONS:
+    suffix = _lower_suffix(file_path)
+    file_type = SUPPORTED_EXTENSIONS.get(suffix)
+    if file_type is None:
         raise ValueError(f"Unsupported file type: {suffix}")
 
-    file_type = SUPPORTED_EXTENSIONS[suffix]
-
     match file_type:
         case "pdf":
             return await extract_pdf(
@@ -820,6 +1197,7 @@ async def extract_document(
                 azure_di_client=azure_di_client,
                 gemini_client=gemini_client,
                 gemini_semaphore=gemini_semaphore,
+                gemini_rate_limiter=gemini_rate_limiter,
                 force=force,
                 extraction_method=extraction_method,
             )
@@ -829,6 +1207,7 @@ async def extract_document(
                 azure_di_client=azure_di_client,
                 gemini_client=gemini_client,
                 gemini_semaphore=gemini_semaphore,
+                gemini_rate_limiter=gemini_rate_limiter,
                 extraction_method=extraction_method,
             )
         case "docx":
@@ -844,4 +1223,9 @@ async def extract_document(
 
 
 def is_supported_file(file_path: Path) -> bool:
-    return file_path.suffix.lower() in SUPPORTED_EXTENSIONS
+    return _lower_suffix(file_path) in SUPPORTED_SUFFIXES
+
+
+def is_supported_name(name: str) -> bool:
+    """``is_supported_file`` for a bare file name, without building a Path."""
+    return _lower_name_suffix(name) in SUPPORTED_SUFFIXES
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+
+class RateLimiter:
+    """Token bucket allowing ``rate`` acquisitions per ``period`` seconds.
+
+    Bursts of up to ``rate`` requests go through immediately; after that,
+    callers are spaced out evenly instead of all hitting the quota and being
+    rejected together.
+    """
+
+    def __init__(self, rate: int, period: float = 60.0) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self._capacity = float(rate)
+        self._tokens = float(rate)
+        self._fill_rate = rate / period
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        # Waiters queue on the lock, so tokens are handed out in FIFO order.
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._capacity,
+                    self._tokens + (now - self._updated) * self._fill_rate,
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._fill_rate)
@@ -12,10 +12,13 @@ from mcp.server.fastmcp import FastMCP
 from mcp_local_rag.config import (
     AZURE_DOCUMENT_INTELLIGENCE_ENDPOINT,
     AZURE_DOCUMENT_INTELLIGENCE_KEY,
+    GEMINI_REQUESTS_PER_MINUTE,
     MAX_CONCURRENT_GEMINI,
     QDRANT_URL,
 )
 from mcp_local_rag.context import AppContext
+from mcp_local_rag.processing.batching import EmbeddingBatcher, QueryEmbeddingBatcher
+from mcp_local_rag.processing.ratelimit import RateLimiter
 from mcp_local_rag.storage import MetadataStore, VectorStore
 from mcp_local_rag.telemetry import configure_azure_monitor_async, configure_logging
 from mcp_local_rag.tools import register_tools
@@ -24,10 +27,17 @@ if TYPE_CHECKING:
     from azure.ai.documentintelligence.aio import DocumentIntelligenceClient
     from azure.core.credentials import AzureKeyCredential
     from azure.identity.aio import DefaultAzureCredential
+    from google import genai
 
 logger = logging.getLogger("mcp_local_rag.server")
 
 
+def _create_gemini_client(api_key: str) -> genai.Client:
+    from google import genai  # noqa: PLC0415
+
+    return genai.Client(api_key=api_key)
+
+
 async def _init_app(app: AppContext) -> None:
     """Initialize API clients and SQLite schema before the lifespan yields.
 
@@ -35,10 +45,18 @@ async def _init_app(app: AppContext) -> None:
     never completes and VS Code surfaces the error, rather than the server
     starting in a broken state where every tool call fails.
     """
-    if api_key := os.environ.get("GEMINI_API_KEY"):
-        from google import genai  # noqa: PLC0415
+    # Independent: the schema setup runs in a worker thread while the
+    # (import-heavy) API clients are built.
+    await asyncio.gather(
+        asyncio.to_thread(app.metadata_store._init_db),  # noqa: SLF001
+        _init_clients(app),
+    )
+    logger.info("DB initialized")
+
 
-        app.gemini_client = genai.Client(api_key=api_key)
+async def _init_clients(app: AppContext) -> None:
+    if api_key := os.environ.get("GEMINI_API_KEY"):
+        app.gemini_client = await asyncio.to_thread(_create_gemini_client, api_key)
     else:
         logger.warning("GEMINI_API_KEY not set — Gemini OCR functionality disabled")
 
@@ -67,22 +85,22 @@ async def _init_app(app: AppContext) -> None:
                 "install with: uv add mcp-local-rag[azure]"
             )
 
-    await asyncio.to_thread(app.metadata_store._init_db)  # noqa: SLF001
-    logger.info("DB initialized")
-
 
 async def _background_warmup() -> None:
     """Best-effort pre-warming after the MCP handshake completes.
 
-    Loads the embedding model and configures Azure Monitor telemetry so
-    they are ready before the first tool call.  Failures are logged and
-    swallowed — tools retry these lazily on each call.
+    Loads the embedding model and text splitter and configures Azure Monitor
+    telemetry so they are ready before the first tool call.  Failures are
+    logged and swallowed — tools retry these lazily on each call.
     """
+    from mcp_local_rag.processing.chunking import preload_splitter  # noqa: PLC0415
     from mcp_local_rag.processing.embeddings import get_embedding_model  # noqa: PLC0415
 
     async def _model() -> None:
         try:
             await asyncio.to_thread(get_embedding_model)
+            # The splitter reuses the model's tokenizer, so build it second.
+            await asyncio.to_thread(preload_splitter)
             logger.info("Embedding model warmed up")
         except Exception:
             logger.warning(
@@ -107,6 +125,13 @@ async def app_lifespan(server: FastMCP[AppContext]) -> AsyncIterator[AppContext]
         azure_di_client=None,
         gemini_client=None,
         gemini_semaphore=asyncio.Semaphore(MAX_CONCURRENT_GEMINI),
+        gemini_rate_limiter=(
+            RateLimiter(GEMINI_REQUESTS_PER_MINUTE)
+            if GEMINI_REQUESTS_PER_MINUTE > 0
+            else None
+        ),
+        embedding_batcher=EmbeddingBatcher(),
+        query_batcher=QueryEmbeddingBatcher(),
         metadata_store=MetadataStore.create_uninitialized(),
         vector_store=VectorStore(url=QDRANT_URL),  # lazy — no I/O yet
     )
@@ -123,6 +148,7 @@ async def app_lifespan(server: FastMCP[AppContext]) -> AsyncIterator[AppContext]
         with contextlib.suppress(asyncio.CancelledError):
             await asyncio.shield(warmup_task)
         app.vector_store.close()
+        app.metadata_store.close()
         if app.azure_di_client is not None:
             await app.azure_di_client.close()
 
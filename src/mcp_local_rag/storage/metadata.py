@@ -1,9 +1,10 @@
 import sqlite3
+import threading
 from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Iterator
+from typing import Any, Iterator
 
 from mcp_local_rag.config import SQLITE_PATH, ensure_data_dir
 
@@ -26,12 +27,42 @@ class DocumentInfo:
     chunk_count: int
     markdown_path: str
     indexed_at: datetime
+    # NULL for rows indexed before the size was recorded.
+    file_size: int | None = None
+
+
+# Stays well under SQLITE_MAX_VARIABLE_NUMBER on every supported SQLite build.
+_MAX_SQL_PARAMS = 500
+
+_DOCUMENT_COLUMNS = (
+    "doc_id, file_path, file_hash, file_mtime, file_type,"
+    " collection, chunk_count, markdown_path, indexed_at, file_size"
+)
+
+
+def _document_from_row(row: sqlite3.Row | tuple[Any, ...]) -> DocumentInfo:
+    """Build a DocumentInfo from a row selected with ``_DOCUMENT_COLUMNS``."""
+    return DocumentInfo(
+        row[0],
+        row[1],
+        row[2],
+        row[3] or 0.0,
+        row[4],
+        row[5],
+        row[6],
+        row[7],
+        row[8],
+        row[9],
+    )
 
 
 class MetadataStore:
     def __init__(self, db_path: Path | None = None) -> None:
         ensure_data_dir()
         self.db_path = db_path or SQLITE_PATH
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.RLock()
+        self._depth = 0
         self._init_db()
 
     @classmethod
@@ -43,8 +74,21 @@ class MetadataStore:
         instance = cls.__new__(cls)
         ensure_data_dir()
         instance.db_path = db_path or SQLITE_PATH
+        instance._conn = None
+        instance._lock = threading.RLock()
+        instance._depth = 0
         return instance
 
+    @property
+    def page_cache_path(self) -> Path:
+        return self.db_path.with_name("page_cache.db")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
     def vacuum(self) -> None:
         """Reclaim disk space. Call after large deletions, not on every startup."""
         with self._get_connection() as conn:
@@ -56,7 +100,8 @@ class MetadataStore:
                 """
                 CREATE TABLE IF NOT EXISTS collections (
                     name TEXT PRIMARY KEY,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    document_count INTEGER NOT NULL DEFAULT 0
                 );
 
                 CREATE TABLE IF NOT EXISTS documents (
@@ -69,22 +114,22 @@ class MetadataStore:
                     chunk_count INTEGER NOT NULL DEFAULT 0,
                     markdown_path TEXT NOT NULL,
                     indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    file_size INTEGER,
                     FOREIGN KEY (collection) REFERENCES collections(name) ON DELETE CASCADE
                 );
 
                 CREATE INDEX IF NOT EXISTS idx_documents_collection ON documents(collection);
-                CREATE INDEX IF NOT EXISTS idx_documents_file_path ON documents(file_path);
+                CREATE INDEX IF NOT EXISTS idx_documents_path_collection
+                    ON documents(file_path, collection, file_hash);
                 CREATE INDEX IF NOT EXISTS idx_documents_file_hash ON documents(file_hash);
 
-                CREATE TABLE IF NOT EXISTS page_cache (
+                CREATE TABLE IF NOT EXISTS cache.page_cache (
                     file_hash TEXT NOT NULL,
                     page_index INTEGER NOT NULL,
                     content TEXT NOT NULL,
                     cached_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     PRIMARY KEY (file_hash, page_index)
                 );
-
-                CREATE INDEX IF NOT EXISTS idx_page_cache_file_hash ON page_cache(file_hash);
                 """
             )
             self._migrate(conn)
@@ -95,26 +140,105 @@ class MetadataStore:
             conn.execute(
                 "ALTER TABLE documents ADD COLUMN markdown_path TEXT NOT NULL DEFAULT ''"
             )
+        if "file_size" not in columns:
+            conn.execute("ALTER TABLE documents ADD COLUMN file_size INTEGER")
+        # The page cache moved to its own attached file; the old table only
+        # ever held transient resume data.
+        conn.execute("DROP TABLE IF EXISTS main.page_cache")
+        # Superseded by idx_documents_path_collection, whose prefix covers it.
+        conn.execute("DROP INDEX IF EXISTS idx_documents_file_path")
+
+        collection_columns = {
+            row[1] for row in conn.execute("PRAGMA table_info(collections)")
+        }
+        if "document_count" not in collection_columns:
+            conn.execute(
+                "ALTER TABLE collections ADD COLUMN document_count INTEGER NOT NULL DEFAULT 0"
+            )
+            conn.execute(
+                """
+                UPDATE collections SET document_count = (
+                    SELECT COUNT(*) FROM documents d WHERE d.collection = collections.name
+                )
+                """
+            )
+        # Keep collections.document_count in step with documents so listing
+        # collections never has to aggregate the documents table.
+        conn.executescript(
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_documents_insert AFTER INSERT ON documents
+            BEGIN
+                UPDATE collections SET document_count = document_count + 1
+                WHERE name = NEW.collection;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_documents_delete AFTER DELETE ON documents
+            BEGIN
+                UPDATE collections SET document_count = document_count - 1
+                WHERE name = OLD.collection;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_documents_move
+            AFTER UPDATE OF collection ON documents
+            WHEN OLD.collection IS NOT NEW.collection
+            BEGIN
+                UPDATE collections SET document_count = document_count - 1
+                WHERE name = OLD.collection;
+                UPDATE collections SET document_count = document_count + 1
+                WHERE name = NEW.collection;
+            END;
+            """
+        )
 
-    @contextmanager
-    def _get_connection(self) -> Iterator[sqlite3.Connection]:
+    def _connect(self) -> sqlite3.Connection:
+        # Opened once and shared: the event loop and worker threads both use
+        # the store, so access is serialized by self._lock instead.
         conn = sqlite3.connect(
             self.db_path,
             detect_types=sqlite3.PARSE_DECLTYPES,
             timeout=30.0,
+            check_same_thread=False,
         )
         conn.row_factory = sqlite3.Row
         conn.execute("PRAGMA journal_mode = WAL")
+        # WAL + NORMAL stays consistent across crashes; only a power loss can
+        # drop the last commits, and nothing here is irreplaceable.
+        conn.execute("PRAGMA synchronous = NORMAL")
         conn.execute("PRAGMA busy_timeout = 30000")
         conn.execute("PRAGMA foreign_keys = ON")
-        try:
-            yield conn
-            conn.commit()
-        except Exception:
-            conn.rollback()
-            raise
-        finally:
-            conn.close()
+        # Per-page extraction results live in a separate file so their large
+        # TEXT rows stay out of the metadata WAL and checkpoints. They can be
+        # regenerated, so that file skips fsync entirely.
+        conn.execute("ATTACH DATABASE ? AS cache", (str(self.page_cache_path),))
+        conn.execute("PRAGMA cache.journal_mode = WAL")
+        conn.execute("PRAGMA cache.synchronous = OFF")
+        return conn
+
+    @contextmanager
+    def _get_connection(self) -> Iterator[sqlite3.Connection]:
+        """Yield the shared connection; each outermost block is one transaction."""
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            conn = self._conn
+            outermost = self._depth == 0
+            self._depth += 1
+            try:
+                yield conn
+                if outermost:
+                    conn.commit()
+            except Exception:
+                if outermost:
+                    conn.rollback()
+                raise
+            finally:
+                self._depth -= 1
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Group several store calls into a single commit."""
+        with self._get_connection():
+            yield
 
     def create_collection(self, name: str) -> bool:
         with self._get_connection() as conn:
@@ -133,11 +257,9 @@ class MetadataStore:
         with self._get_connection() as conn:
             row = conn.execute(
                 """
-                SELECT c.name, c.created_at, COUNT(d.doc_id) as document_count
-                FROM collections c
-                LEFT JOIN documents d ON c.name = d.collection
-                WHERE c.name = ?
-                GROUP BY c.name
+                SELECT name, created_at, document_count
+                FROM collections
+                WHERE name = ?
                 """,
                 (name,),
             ).fetchone()
@@ -155,11 +277,9 @@ class MetadataStore:
         with self._get_connection() as conn:
             rows = conn.execute(
                 """
-                SELECT c.name, c.created_at, COUNT(d.doc_id) as document_count
-                FROM collections c
-                LEFT JOIN documents d ON c.name = d.collection
-                GROUP BY c.name
-                ORDER BY c.name
+                SELECT name, created_at, document_count
+                FROM collections
+                ORDER BY name
                 """
             ).fetchall()
 
@@ -189,13 +309,24 @@ class MetadataStore:
         collection: str,
         chunk_count: int,
         markdown_path: str,
+        file_size: int | None = None,
     ) -> None:
         with self._get_connection() as conn:
             conn.execute(
                 """
-                INSERT OR REPLACE INTO documents
-                (doc_id, file_path, file_hash, file_mtime, file_type, collection, chunk_count, markdown_path, indexed_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                INSERT INTO documents
+                (doc_id, file_path, file_hash, file_mtime, file_type, collection, chunk_count, markdown_path, indexed_at, file_size)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?)
+                ON CONFLICT (doc_id) DO UPDATE SET
+                    file_path = excluded.file_path,
+                    file_hash = excluded.file_hash,
+                    file_mtime = excluded.file_mtime,
+                    file_type = excluded.file_type,
+                    collection = excluded.collection,
+                    chunk_count = excluded.chunk_count,
+                    markdown_path = excluded.markdown_path,
+                    indexed_at = excluded.indexed_at,
+                    file_size = excluded.file_size
                 """,
                 (
                     doc_id,
@@ -206,6 +337,7 @@ class MetadataStore:
                     collection,
                     chunk_count,
                     markdown_path,
+                    file_size,
                 ),
             )
 
@@ -217,80 +349,89 @@ class MetadataStore:
     def get_document(self, doc_id: str) -> DocumentInfo | None:
         with self._get_connection() as conn:
             row = conn.execute(
-                "SELECT * FROM documents WHERE doc_id = ?", (doc_id,)
+                f"SELECT {_DOCUMENT_COLUMNS} FROM documents WHERE doc_id = ?", (doc_id,)
             ).fetchone()
 
             if row is None:
                 return None
 
-            return DocumentInfo(
-                doc_id=row["doc_id"],
-                file_path=row["file_path"],
-                file_hash=row["file_hash"],
-                file_mtime=row["file_mtime"] or 0.0,
-                file_type=row["file_type"],
-                collection=row["collection"],
-                chunk_count=row["chunk_count"],
-                markdown_path=row["markdown_path"],
-                indexed_at=row["indexed_at"],
-            )
+            return _document_from_row(row)
 
     def get_document_by_path(
         self, file_path: str, collection: str
     ) -> DocumentInfo | None:
         with self._get_connection() as conn:
             row = conn.execute(
-                "SELECT * FROM documents WHERE file_path = ? AND collection = ?",
+                f"SELECT {_DOCUMENT_COLUMNS} FROM documents"
+                " WHERE file_path = ? AND collection = ?",
                 (file_path, collection),
             ).fetchone()
 
             if row is None:
                 return None
 
-            return DocumentInfo(
-                doc_id=row["doc_id"],
-                file_path=row["file_path"],
-                file_hash=row["file_hash"],
-                file_mtime=row["file_mtime"] or 0.0,
-                file_type=row["file_type"],
-                collection=row["collection"],
-                chunk_count=row["chunk_count"],
-                markdown_path=row["markdown_path"],
-                indexed_at=row["indexed_at"],
-            )
+            return _document_from_row(row)
+
+    def get_documents_by_paths(
+        self, file_paths: list[str], collection: str
+    ) -> dict[str, DocumentInfo]:
+        """Look up many paths in one collection; missing paths are left out."""
+        found: dict[str, DocumentInfo] = {}
+        with self._get_connection() as conn:
+            for start in range(0, len(file_paths), _MAX_SQL_PARAMS):
+                batch = file_paths[start : start + _MAX_SQL_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT {_DOCUMENT_COLUMNS} FROM documents"
+                    f" WHERE collection = ? AND file_path IN ({placeholders})",
+                    (collection, *batch),
+                )
+                for row in rows:
+                    doc = _document_from_row(row)
+                    found[doc.file_path] = doc
+        return found
+
+    def remove_documents(self, docs: list[DocumentInfo]) -> None:
+        """Delete documents and their cached pages in a single transaction."""
+        with self._get_connection() as conn:
+            for start in range(0, len(docs), _MAX_SQL_PARAMS):
+                batch = docs[start : start + _MAX_SQL_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                conn.execute(
+                    f"DELETE FROM documents WHERE doc_id IN ({placeholders})",
+                    [d.doc_id for d in batch],
+                )
+                conn.execute(
+                    f"DELETE FROM cache.page_cache WHERE file_hash IN ({placeholders})",
+                    [d.file_hash for d in batch],
+                )
 
     def list_documents(self, collection: str | None = None) -> list[DocumentInfo]:
         with self._get_connection() as conn:
+            # Plain tuples: building a Row per document dominates large listings.
+            cursor = conn.cursor()
+            cursor.row_factory = None
             if collection:
-                rows = conn.execute(
-                    "SELECT * FROM documents WHERE collection = ? ORDER BY file_path",
+                cursor.execute(
+                    f"SELECT {_DOCUMENT_COLUMNS} FROM documents"
+                    " WHERE collection = ? ORDER BY file_path",
                     (collection,),
-                ).fetchall()
+                )
             else:
-                rows = conn.execute(
-                    "SELECT * FROM documents ORDER BY collection, file_path"
-                ).fetchall()
-
-            return [
-                DocumentInfo(
-                    doc_id=row["doc_id"],
-                    file_path=row["file_path"],
-                    file_hash=row["file_hash"],
-                    file_mtime=row["file_mtime"] or 0.0,
-                    file_type=row["file_type"],
-                    collection=row["collection"],
-                    chunk_count=row["chunk_count"],
-                    markdown_path=row["markdown_path"],
-                    indexed_at=row["indexed_at"],
+                cursor.execute(
+                    f"SELECT {_DOCUMENT_COLUMNS} FROM documents"
+                    " ORDER BY collection, file_path"
                 )
-                for row in rows
-            ]
+            return [_document_from_row(row) for row in cursor]
 
-    def update_document_mtime(self, doc_id: str, file_mtime: float) -> None:
+    def update_document_mtime(
+        self, doc_id: str, file_mtime: float, file_size: int | None = None
+    ) -> None:
         with self._get_connection() as conn:
             conn.execute(
-                "UPDATE documents SET file_mtime = ? WHERE doc_id = ?",
-                (file_mtime, doc_id),
+                "UPDATE documents SET file_mtime = ?, file_size = COALESCE(?, file_size)"
+                " WHERE doc_id = ?",
+                (file_mtime, file_size, doc_id),
             )
 
     # ── Page cache ──────────────────────────────────────────────────────
@@ -299,24 +440,41 @@ class MetadataStore:
         """Load a cached page conversion result, or return None."""
         with self._get_connection() as conn:
             row = conn.execute(
-                "SELECT content FROM page_cache WHERE file_hash = ? AND page_index = ?",
+                "SELECT content FROM cache.page_cache WHERE file_hash = ? AND page_index = ?",
                 (file_hash, page_index),
             ).fetchone()
             return row["content"] if row else None
 
+    def get_cached_pages(self, file_hash: str) -> dict[int, str]:
+        """Load every cached page for a file, keyed by page index."""
+        with self._get_connection() as conn:
+            rows = conn.execute(
+                "SELECT page_index, content FROM cache.page_cache WHERE file_hash = ?",
+                (file_hash,),
+            ).fetchall()
+            return {row["page_index"]: row["content"] for row in rows}
+
     def cache_page(self, file_hash: str, page_index: int, content: str) -> None:
         """Store a page conversion result in the cache."""
         with self._get_connection() as conn:
             conn.execute(
-                "INSERT OR REPLACE INTO page_cache (file_hash, page_index, content) VALUES (?, ?, ?)",
+                "INSERT OR REPLACE INTO cache.page_cache (file_hash, page_index, content) VALUES (?, ?, ?)",
                 (file_hash, page_index, content),
             )
 
+    def cache_pages(self, file_hash: str, pages: list[tuple[int, str]]) -> None:
+        """Store several page conversion results in a single transaction."""
+        with self._get_connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache.page_cache (file_hash, page_index, content) VALUES (?, ?, ?)",
+                [(file_hash, page_index, content) for page_index, content in pages],
+            )
+
     def clear_page_cache(self, file_hash: str) -> int:
         """Remove all cached pages for a given file hash. Returns count deleted."""
         with self._get_connection() as conn:
             cursor = conn.execute(
-                "DELETE FROM page_cache WHERE file_hash = ?", (file_hash,)
+                "DELETE FROM cache.page_cache WHERE file_hash = ?", (file_hash,)
             )
             return cursor.rowcount
 
@@ -325,7 +483,7 @@ class MetadataStore:
         with self._get_connection() as conn:
             cursor = conn.execute(
                 """
-                DELETE FROM page_cache WHERE file_hash IN (
+                DELETE FROM cache.page_cache WHERE file_hash IN (
                     SELECT file_hash FROM documents WHERE collection = ?
                 )
                 """,
@@ -1,15 +1,19 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+import functools
 import logging
 from pathlib import Path
-from typing import TYPE_CHECKING, Literal
+import threading
+from typing import TYPE_CHECKING, Concatenate, Literal, ParamSpec, TypeVar
 import uuid
 
-from mcp_local_rag.config import QDRANT_PATH, ensure_data_dir
+from mcp_local_rag.config import QDRANT_HNSW_EF, QDRANT_PATH, ensure_data_dir
 from mcp_local_rag.processing.embeddings import get_embedding_dimension
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
     import numpy as np
     from numpy.typing import NDArray
     from qdrant_client import QdrantClient
@@ -20,12 +24,19 @@ if TYPE_CHECKING:
         Filter,
         MatchValue,
         PayloadSchemaType,
-        PointStruct,
+        SearchParams,
         VectorParams,
     )
 
 logger = logging.getLogger("mcp_local_rag.storage.vectors")
 
+_UPSERT_BATCH_SIZE = 256
+# Fixed namespace for chunk point IDs; changing it would orphan existing points.
+_CHUNK_ID_NAMESPACE = uuid.UUID("6f1c3b9e-4a84-5d2b-9f0e-2c7a51d8e3b4")
+# Bump when _ensure_collection gains new setup (e.g. another payload index) so
+# existing embedded stores run it once more.
+_SCHEMA_VERSION = 1
+
 
 def _qdrant_client_cls() -> type[QdrantClient]:
     from qdrant_client import QdrantClient as _cls  # noqa: PLC0415
@@ -52,6 +63,31 @@ class SearchResult:
     score: float
 
 
+_P = ParamSpec("_P")
+_R = TypeVar("_R")
+
+
+def _synchronized(
+    method: Callable[Concatenate[VectorStore, _P], _R],
+) -> Callable[Concatenate[VectorStore, _P], _R]:
+    """Serialize calls on a store: the embedded client is not thread-safe, and
+    indexing calls in from worker threads while searches run on the loop."""
+
+    @functools.wraps(method)
+    def wrapper(self: VectorStore, *args: _P.args, **kwargs: _P.kwargs) -> _R:
+        with self._lock:  # pyright: ignore[reportPrivateUsage]
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def _marker_is_current(marker: Path) -> bool:
+    try:
+        return marker.read_text().strip() == str(_SCHEMA_VERSION)
+    except FileNotFoundError:
+        return False
+
+
 class VectorStore:
     COLLECTION_NAME = "chunks"
 
@@ -62,6 +98,7 @@ class VectorStore:
         self.db_path: Path | None
         self._client: QdrantClient | None = None
         self._collection_ready = False
+        self._lock = threading.Lock()
 
         if url:
             self._mode = "client"
@@ -100,24 +137,46 @@ class VectorStore:
                 logger.info("Qdrant embedded mode: %s", self.db_path)
         return self._client
 
+    @property
+    def _ready_marker(self) -> Path | None:
+        """Sentinel written once embedded storage has its collection and indexes."""
+        return self.db_path / ".ready" if self.db_path else None
+
     def _ensure_collection_once(self) -> None:
         """Ensure the Qdrant collection exists. Called lazily on first operation."""
         if self._collection_ready:
             return
-        self._ensure_collection()
+        marker = self._ready_marker
+        if marker is None or not _marker_is_current(marker):
+            self._ensure_collection()
+            if marker is not None:
+                marker.write_text(str(_SCHEMA_VERSION))
         self._collection_ready = True
 
     def _ensure_collection(self) -> None:
         m = _qdrant_models()
-        collections = self.client.get_collections().collections
-        collection_names = [c.name for c in collections]
-        if self.COLLECTION_NAME not in collection_names:
+        if not self.client.collection_exists(self.COLLECTION_NAME):
             dim = get_embedding_dimension()
             if dim is None:
                 raise RuntimeError("Failed to determine embedding dimension")
             self.client.create_collection(
                 collection_name=self.COLLECTION_NAME,
-                vectors_config=m.VectorParams(size=dim, distance=m.Distance.COSINE),
+                # Store vectors as fp16: half the on-disk/in-memory footprint with
+                # negligible recall loss for normalized sentence embeddings.
+                vectors_config=m.VectorParams(
+                    size=dim,
+                    distance=m.Distance.COSINE,
+                    datatype=m.Datatype.FLOAT16,
+                ),
+                # int8 copies kept in RAM for graph traversal; search rescores
+                # the candidates against the stored vectors.
+                quantization_config=m.ScalarQuantization(
+                    scalar=m.ScalarQuantizationConfig(
+                        type=m.ScalarType.INT8,
+                        quantile=0.99,
+                        always_ram=True,
+                    )
+                ),
             )
         self._ensure_payload_indexes()
 
@@ -141,6 +200,7 @@ class VectorStore:
                 field_schema=m.PayloadSchemaType.KEYWORD,
             )
 
+    @_synchronized
     def add_chunks(
         self,
         chunks: list[str],
@@ -154,72 +214,110 @@ class VectorStore:
             return 0
 
         m = _qdrant_models()
-        points = [
-            m.PointStruct(
-                id=str(uuid.uuid4()),
-                vector=embeddings[i].tolist(),
-                payload={
-                    "text": chunk,
-                    "doc_id": doc_id,
-                    "file_path": file_path,
-                    "collection": collection,
-                    "chunk_index": i,
-                },
+        # Upsert in bounded batches so very large documents do not build a
+        # single multi-megabyte request.
+        for start in range(0, len(chunks), _UPSERT_BATCH_SIZE):
+            indices = range(start, min(start + _UPSERT_BATCH_SIZE, len(chunks)))
+            # One C-level conversion per batch instead of one per row. As
+            # Python floats the vectors take several times the array's size,
+            # so the whole matrix is never converted at once.
+            vectors: list[list[float]] = embeddings[start : indices.stop].tolist()
+            # Column-wise Batch: one list per field instead of a PointStruct
+            # object per chunk.
+            batch = m.Batch(
+                # Deterministic per (doc_id, chunk_index): re-upserting a
+                # document overwrites its points instead of duplicating them.
+                ids=[
+                    str(uuid.uuid5(_CHUNK_ID_NAMESPACE, f"{doc_id}:{i}"))
+                    for i in indices
+                ],
+                vectors=vectors,
+                payloads=[
+                    {
+                        "text": chunks[i],
+                        "doc_id": doc_id,
+                        "file_path": file_path,
+                        "collection": collection,
+                        "chunk_index": i,
+                    }
+                    for i in indices
+                ],
             )
-            for i, chunk in enumerate(chunks)
-        ]
+            self.client.upsert(collection_name=self.COLLECTION_NAME, points=batch)
+        return len(chunks)
 
-        self.client.upsert(collection_name=self.COLLECTION_NAME, points=points)
-        return len(points)
+    @_synchronized
+    def get_chunk_vectors(self, doc_id: str) -> dict[str, NDArray[np.float32]]:
+        """Map each stored chunk text of a document to its vector."""
+        import numpy as np  # noqa: PLC0415
 
-    def delete_document_chunks(self, doc_id: str) -> int:
         self._ensure_collection_once()
         m = _qdrant_models()
-        # Count before deletion
-        count_result = self.client.count(
+        doc_filter = m.Filter(
+            must=[m.FieldCondition(key="doc_id", match=m.MatchValue(value=doc_id))]
+        )
+        # Packed as arrays page by page; a huge document's vectors as Python
+        # float lists would dwarf its text.
+        vectors: dict[str, NDArray[np.float32]] = {}
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.COLLECTION_NAME,
+                scroll_filter=doc_filter,
+                limit=_UPSERT_BATCH_SIZE,
+                offset=offset,
+                with_payload=["text"],
+                with_vectors=True,
+            )
+            for point in points:
+                vector = point.vector
+                if point.payload is not None and isinstance(vector, list):
+                    text: str = point.payload["text"]
+                    vectors[text] = np.asarray(vector, dtype=np.float32)
+            if offset is None:
+                return vectors
+
+    @_synchronized
+    def delete_document_chunks(self, doc_id: str) -> None:
+        # A single delete: callers never needed the count, and deleting an
+        # absent doc_id is a no-op, so no count() round-trip first.
+        self._ensure_collection_once()
+        m = _qdrant_models()
+        self.client.delete(
             collection_name=self.COLLECTION_NAME,
-            count_filter=m.Filter(
+            points_selector=m.Filter(
                 must=[m.FieldCondition(key="doc_id", match=m.MatchValue(value=doc_id))]
             ),
         )
-        count_before = count_result.count
 
-        if count_before > 0:
-            self.client.delete(
-                collection_name=self.COLLECTION_NAME,
-                points_selector=m.Filter(
-                    must=[m.FieldCondition(key="doc_id", match=m.MatchValue(value=doc_id))]
-                ),
-            )
-        return count_before
+    @_synchronized
+    def delete_chunks_for_documents(self, doc_ids: list[str]) -> None:
+        """Delete the chunks of many documents with one filtered delete."""
+        if not doc_ids:
+            return
+        self._ensure_collection_once()
+        m = _qdrant_models()
+        self.client.delete(
+            collection_name=self.COLLECTION_NAME,
+            points_selector=m.Filter(
+                must=[m.FieldCondition(key="doc_id", match=m.MatchAny(any=doc_ids))]
+            ),
+        )
 
-    def delete_collection_chunks(self, collection: str) -> int:
+    @_synchronized
+    def delete_collection_chunks(self, collection: str) -> None:
         self._ensure_collection_once()
         m = _qdrant_models()
-        # Count before deletion
-        count_result = self.client.count(
+        self.client.delete(
             collection_name=self.COLLECTION_NAME,
-            count_filter=m.Filter(
+            points_selector=m.Filter(
                 must=[
                     m.FieldCondition(key="collection", match=m.MatchValue(value=collection))
                 ]
             ),
         )
-        count_before = count_result.count
-
-        if count_before > 0:
-            self.client.delete(
-                collection_name=self.COLLECTION_NAME,
-                points_selector=m.Filter(
-                    must=[
-                        m.FieldCondition(
-                            key="collection", match=m.MatchValue(value=collection)
-                        )
-                    ]
-                ),
-            )
-        return count_before
 
+    @_synchronized
     def search(
         self,
         query_embedding: NDArray[np.float32],
@@ -236,36 +334,51 @@ class VectorStore:
                 m.FieldCondition(key="collection", match=m.MatchValue(value=collection))
             )
         if doc_ids:
-            doc_conditions: list[Condition] = [
-                m.FieldCondition(key="doc_id", match=m.MatchValue(value=d)) for d in doc_ids
-            ]
-            doc_filter: Condition = m.Filter(should=doc_conditions)
-            conditions.append(doc_filter)
+            conditions.append(
+                m.FieldCondition(key="doc_id", match=m.MatchAny(any=doc_ids))
+            )
 
         query_filter: Filter | None = None
         if conditions:
             query_filter = m.Filter(must=conditions)
 
+        # Embedded mode is an exact scan and warns on search_params; only a
+        # server walks the quantized HNSW graph.
+        search_params: SearchParams | None = None
+        if self._mode == "client":
+            search_params = m.SearchParams(
+                # 0 keeps the server's default beam width (its ef_construct).
+                hnsw_ef=QDRANT_HNSW_EF or None,
+                quantization=m.QuantizationSearchParams(rescore=True, oversampling=2.0),
+            )
+
         results = self.client.query_points(
             collection_name=self.COLLECTION_NAME,
-            query=query_embedding.tolist(),
+            # The client takes the array as-is; no per-element Python floats.
+            query=query_embedding,
             limit=top_k,
             query_filter=query_filter,
+            search_params=search_params,
             with_payload=True,
         )
 
-        return [
-            SearchResult(
-                text=str(point.payload["text"]) if point.payload else "",
-                doc_id=str(point.payload["doc_id"]) if point.payload else "",
-                file_path=str(point.payload["file_path"]) if point.payload else "",
-                collection=str(point.payload["collection"]) if point.payload else "",
-                chunk_index=int(point.payload["chunk_index"]) if point.payload else 0,
-                score=point.score,
+        # Payloads are written by add_chunks with the right types already.
+        hits: list[SearchResult] = []
+        for point in results.points:
+            payload = point.payload or {}
+            hits.append(
+                SearchResult(
+                    text=payload.get("text", ""),
+                    doc_id=payload.get("doc_id", ""),
+                    file_path=payload.get("file_path", ""),
+                    collection=payload.get("collection", ""),
+                    chunk_index=payload.get("chunk_index", 0),
+                    score=point.score,
+                )
             )
-            for point in results.points
-        ]
+        return hits
 
+    @_synchronized
     def get_collection_stats(self, collection: str) -> CollectionStats:
         self._ensure_collection_once()
         m = _qdrant_models()
@@ -279,6 +392,7 @@ class VectorStore:
         )
         return CollectionStats(chunk_count=count_result.count)
 
+    @_synchronized
     def close(self) -> None:
         if self._client is not None:
             self._client.close()
@@ -16,8 +16,11 @@ Call order
 """
 
 import asyncio
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import sys
 
 LOGGER_NAME = "mcp_local_rag"
@@ -26,16 +29,25 @@ logger = logging.getLogger(LOGGER_NAME)
 
 
 def configure_logging() -> None:
-    """Set up stderr logging only — no network calls."""
+    """Set up stderr logging only — no network calls.
+
+    Records are handed to a background ``QueueListener`` thread, so the
+    concurrent indexing workers only enqueue instead of contending for the
+    stream handler's lock and writing to stderr themselves.
+    """
     logger.setLevel(logging.INFO)
     # Guard against duplicate handlers if called more than once (e.g. in tests).
-    if not any(
-        isinstance(h, logging.StreamHandler) and h.stream is sys.stderr
-        for h in logger.handlers
-    ):
+    if not any(isinstance(h, logging.handlers.QueueHandler) for h in logger.handlers):
         handler = logging.StreamHandler(sys.stderr)
         handler.setFormatter(logging.Formatter("%(levelname)-8s %(message)s"))
-        logger.addHandler(handler)
+        log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(
+            log_queue, handler, respect_handler_level=True
+        )
+        listener.start()
+        # Drain whatever is still queued before the interpreter exits.
+        atexit.register(listener.stop)
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
 
 
 async def configure_azure_monitor_async() -> None:
@@ -51,6 +63,13 @@ async def configure_azure_monitor_async() -> None:
         )
         return
 
+    if await asyncio.to_thread(_configure_azure_monitor, connection_string):
+        logger.info("Azure Monitor telemetry configured")
+
+
+def _configure_azure_monitor(connection_string: str) -> bool:
+    # The import pulls in the whole OpenTelemetry SDK and takes seconds, so it
+    # runs in the worker thread too rather than stalling the event loop.
     try:
         from azure.monitor.opentelemetry import configure_azure_monitor  # pyright: ignore[reportUnknownVariableType]  # noqa: PLC0415
     except ImportError:
@@ -58,12 +77,11 @@ async def configure_azure_monitor_async() -> None:
             "azure-monitor-opentelemetry is not installed — "
             "install with: uv add mcp-local-rag[azure]"
         )
-        return
+        return False
 
-    await asyncio.to_thread(
-        configure_azure_monitor,  # pyright: ignore[reportUnknownArgumentType]
+    configure_azure_monitor(  # pyright: ignore[reportUnknownArgumentType]
         connection_string=connection_string,
         enable_live_metrics=True,
         logger_name=LOGGER_NAME,
     )
-    logger.info("Azure Monitor telemetry configured")
+    return True
@@ -51,7 +51,8 @@ def register_tools(mcp: FastMCP[AppContext]) -> None:
         description="Index all supported files in a directory into a collection. "
         "Supports PDF, DOCX, HTML, PPTX, XLSX, plaintext, and image files (JPG, PNG, BMP, TIFF, WebP, HEIC/HEIF). "
         "Use glob_pattern to filter files (e.g., '*.pdf' for only PDFs, '*.png' for only PNGs). "
-        "Set recursive=True to include subdirectories. "
+        "Set recursive=True to include subdirectories "
+        "(.git, .venv, __pycache__ and node_modules are skipped). "
         "extraction_method controls conversion quality: "
         "'auto' (default) uses Azure Document Intelligence if configured (best quality, private), "
         "otherwise Gemini AI for scanned/OCR pages and PyMuPDF for text-based pages; "
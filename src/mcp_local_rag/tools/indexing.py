@@ -1,11 +1,19 @@
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import fnmatch
 import hashlib
 import logging
+import os
 from pathlib import Path
+import re
+import stat
 
+import numpy as np
+from numpy.typing import NDArray
 from pydantic import BaseModel
 
 from mcp_local_rag.config import (
+    INDEX_IGNORE_DIRS,
     MARKDOWN_DIR,
     MAX_CONCURRENT_FILES,
     SUPPORTED_EXTENSIONS,
@@ -15,14 +23,17 @@ from mcp_local_rag.processing import (
     chunk_text,
     compute_file_hash,
     extract_document,
+    ExtractedDocument,
     ExtractionMethod,
-    get_file_mtime,
     is_supported_file,
+    is_supported_name,
 )
-from mcp_local_rag.processing.embeddings import embed_texts
+from mcp_local_rag.storage import DocumentInfo
 
 logger = logging.getLogger("mcp_local_rag.tools.indexing")
 
+_PROGRESS_EVERY = 100
+
 
 def make_doc_id(file_path: str, collection: str) -> str:
     """Generate deterministic doc_id from file path and collection.
@@ -61,121 +72,300 @@ class FileIndexResult(BaseModel):
     message: str | None = None
 
 
+def _store_document(
+    app: AppContext,
+    doc: ExtractedDocument,
+    doc_id: str,
+    abs_path: str,
+    collection: str,
+    file_mtime: float,
+    file_size: int,
+    chunks: list[str],
+    embeddings: NDArray[np.float32],
+) -> None:
+    # Remove existing chunks (if previous indexing was interrupted and retried)
+    app.vector_store.delete_document_chunks(doc_id)
+    app.vector_store.add_chunks(chunks, embeddings, doc_id, abs_path, collection)
+
+    markdown_file = MARKDOWN_DIR / f"{doc_id}.md"
+    markdown_file.write_text(doc.content, encoding="utf-8", errors="backslashreplace")
+
+    # The document row and the page-cache cleanup commit together.
+    with app.metadata_store.transaction():
+        app.metadata_store.add_document(
+            doc_id=doc_id,
+            file_path=abs_path,
+            file_hash=doc.file_hash,
+            file_mtime=file_mtime,
+            file_type=doc.file_type,
+            collection=collection,
+            chunk_count=len(chunks),
+            markdown_path=str(markdown_file),
+            file_size=file_size,
+        )
+        # Conversion + indexing succeeded — clear the page cache for this file
+        app.metadata_store.clear_page_cache(doc.file_hash)
+
+
+async def _embed_chunks(
+    app: AppContext, chunks: list[str], previous: DocumentInfo | None
+) -> NDArray[np.float32]:
+    """Embed ``chunks``, reusing vectors of ``previous``'s identical chunks."""
+    if previous is None:
+        return await app.embedding_batcher.embed(chunks)
+    # Edits usually touch a few chunks; the rest keep their stored vectors.
+    known = await asyncio.to_thread(app.vector_store.get_chunk_vectors, previous.doc_id)
+    missing = [c for c in dict.fromkeys(chunks) if c not in known]
+    if missing:
+        embeddings = await app.embedding_batcher.embed(missing)
+        known.update(zip(missing, embeddings, strict=True))
+    logger.debug(
+        "Reused %d of %d chunk embeddings", len(chunks) - len(missing), len(chunks)
+    )
+    return np.array([known[c] for c in chunks], dtype=np.float32)
+
+
 async def _index_single_file(
     app: AppContext,
     file_path: Path,
+    resolved_path: Path,
+    existing: DocumentInfo | None,
     collection: str,
     force: bool,
-    semaphore: asyncio.Semaphore,
     extraction_method: ExtractionMethod = "auto",
 ) -> FileIndexResult:
-    async with semaphore:
-        if not file_path.exists():
-            return FileIndexResult(
-                file_path=str(file_path), success=False, message="File not found"
-            )
+    """Index one file.
 
-        if not is_supported_file(file_path):
-            return FileIndexResult(
-                file_path=str(file_path),
-                success=False,
-                message=f"Unsupported file type: {file_path.suffix}",
-            )
-
-        abs_path = str(file_path.resolve())
+    ``resolved_path`` is the canonical path, and ``existing`` the stored
+    record for it (if any); both are looked up in bulk by the caller.
+    """
+    path_str = str(file_path)
+    # One stat answers exists, is-a-regular-file and the mtime.
+    try:
+        st = file_path.stat()
+    except OSError:
+        st = None
+    if st is None or not stat.S_ISREG(st.st_mode):
+        return FileIndexResult(
+            file_path=path_str, success=False, message="File not found"
+        )
+    current_mtime = st.st_mtime
 
-        doc_id = make_doc_id(abs_path, collection)
-        current_mtime = get_file_mtime(file_path)
+    if not is_supported_file(file_path):
+        return FileIndexResult(
+            file_path=path_str,
+            success=False,
+            message=f"Unsupported file type: {file_path.suffix}",
+        )
 
-        if not force:
-            existing = app.metadata_store.get_document_by_path(abs_path, collection)
-            if existing:
-                if existing.file_mtime == current_mtime:
-                    logger.info("[%s] Skipped (unchanged)", file_path.name)
-                    return FileIndexResult(file_path=str(file_path), success=True)
-                # mtime changed, verify with hash
+    if not force:
+        if existing:
+            # A different size proves the content changed, whatever the mtime
+            # says; rows indexed before sizes were stored can't tell.
+            size_changed = (
+                existing.file_size is not None and existing.file_size != st.st_size
+            )
+            if existing.file_mtime == current_mtime and not size_changed:
+                logger.debug("[%s] Skipped (unchanged)", file_path.name)
+                return FileIndexResult(file_path=path_str, success=True)
+            # mtime changed with the same size, verify with hash
+            if not size_changed:
                 current_hash = await asyncio.to_thread(compute_file_hash, file_path)
                 if current_hash == existing.file_hash:
                     # Content unchanged, just update mtime
                     app.metadata_store.update_document_mtime(
-                        existing.doc_id, current_mtime
+                        existing.doc_id, current_mtime, st.st_size
                     )
-                    logger.info("[%s] Skipped (unchanged)", file_path.name)
-                    return FileIndexResult(file_path=str(file_path), success=True)
-
-        logger.info("[%s] Indexing into collection '%s'", file_path.name, collection)
+                    logger.debug("[%s] Skipped (unchanged)", file_path.name)
+                    return FileIndexResult(file_path=path_str, success=True)
+
+    # Only needed past the unchanged checks, which most re-index files stop at.
+    abs_path = str(resolved_path)
+    doc_id = make_doc_id(abs_path, collection)
+
+    logger.debug("[%s] Indexing into collection '%s'", file_path.name, collection)
+
+    try:
+        doc = await extract_document(
+            resolved_path,
+            metadata_store=app.metadata_store,
+            azure_di_client=app.azure_di_client,
+            gemini_client=app.gemini_client,
+            gemini_semaphore=app.gemini_semaphore,
+            gemini_rate_limiter=app.gemini_rate_limiter,
+            force=force,
+            extraction_method=extraction_method,
+        )
+    except Exception as e:
+        logger.error("[%s] Extraction failed: %s", file_path.name, e)
+        return FileIndexResult(
+            file_path=path_str,
+            success=False,
+            message=f"Extraction failed for {file_path.name}: {e}",
+        )
 
-        try:
-            doc = await extract_document(
-                file_path,
-                metadata_store=app.metadata_store,
-                azure_di_client=app.azure_di_client,
-                gemini_client=app.gemini_client,
-                gemini_semaphore=app.gemini_semaphore,
-                force=force,
-                extraction_method=extraction_method,
-            )
-        except Exception as e:
-            logger.error("[%s] Extraction failed: %s", file_path.name, e)
+    try:
+        chunks = await asyncio.to_thread(chunk_text, doc.content)
+        if not chunks:
+            logger.warning("[%s] No content extracted", file_path.name)
             return FileIndexResult(
-                file_path=str(file_path),
+                file_path=path_str,
                 success=False,
-                message=f"Extraction failed for {file_path.name}: {e}",
+                message=f"No content extracted from: {file_path.name}",
             )
 
-        try:
-            chunks = await asyncio.to_thread(chunk_text, doc.content)
-            if not chunks:
-                logger.warning("[%s] No content extracted", file_path.name)
-                return FileIndexResult(
-                    file_path=str(file_path),
-                    success=False,
-                    message=f"No content extracted from: {file_path.name}",
-                )
+        logger.debug(
+            "[%s] Chunked into %d chunks, embedding...",
+            file_path.name,
+            len(chunks),
+        )
 
-            logger.info(
-                "[%s] Chunked into %d chunks, embedding...",
-                file_path.name,
-                len(chunks),
-            )
+        # Shared with the other files in flight, so small documents get
+        # encoded together. A forced re-index (e.g. after a model change)
+        # never reuses stored vectors.
+        embeddings = await _embed_chunks(app, chunks, None if force else existing)
+
+        # The store writes are synchronous; keep them off the event loop.
+        await asyncio.to_thread(
+            _store_document,
+            app,
+            doc,
+            doc_id,
+            abs_path,
+            collection,
+            current_mtime,
+            st.st_size,
+            chunks,
+            embeddings,
+        )
+    except Exception as e:
+        logger.error("[%s] Indexing failed: %s", file_path.name, e)
+        return FileIndexResult(
+            file_path=path_str,
+            success=False,
+            message=f"Indexing failed for {file_path.name}: {e}",
+        )
 
-            # Remove existing chunks (if previous indexing was interrupted and retried)
-            app.vector_store.delete_document_chunks(doc_id)
+    logger.debug("[%s] Indexed: %d chunks stored", file_path.name, len(chunks))
+    return FileIndexResult(file_path=path_str, success=True)
 
-            embeddings = await asyncio.to_thread(embed_texts, chunks)
 
-            app.vector_store.add_chunks(
-                chunks, embeddings, doc_id, abs_path, collection
-            )
+def _scan_directory(
+    directory: Path, glob_pattern: str, recursive: bool
+) -> tuple[list[Path], list[Path]]:
+    """Find supported files under ``directory`` matching ``glob_pattern``.
 
-            markdown_file = MARKDOWN_DIR / f"{doc_id}.md"
-            markdown_file.write_text(
-                doc.content, encoding="utf-8", errors="backslashreplace"
-            )
+    Returns the paths as found (for reporting) and their canonical paths.
+    """
+    if "/" in glob_pattern or os.sep in glob_pattern or "**" in glob_pattern:
+        # Multi-component patterns keep pathlib's semantics.
+        matches = (
+            directory.rglob(glob_pattern) if recursive else directory.glob(glob_pattern)
+        )
+        globbed = [
+            f
+            for f in matches
+            if f.is_file()
+            and is_supported_file(f)
+            and INDEX_IGNORE_DIRS.isdisjoint(f.relative_to(directory).parts[:-1])
+        ]
+        return globbed, [f.resolve() for f in globbed]
+
+    flags = re.IGNORECASE if os.name == "nt" else 0
+    match_name = re.compile(fnmatch.translate(glob_pattern), flags).match
+    found: list[Path] = []
+    resolved: list[Path] = []
+    # Directory symlinks are never followed, so below the resolved root only a
+    # symlinked file itself can differ from its canonical path.
+    stack = [(str(directory), str(directory.resolve()))]
+    while stack:
+        dirpath, canonical_dir = stack.pop()
+        try:
+            entries = os.scandir(dirpath)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                name = entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive and name not in INDEX_IGNORE_DIRS:
+                        stack.append((entry.path, os.path.join(canonical_dir, name)))
+                    continue
+                if is_supported_name(name) and match_name(name) and entry.is_file():
+                    path = Path(entry.path)
+                    found.append(path)
+                    resolved.append(
+                        path.resolve()
+                        if entry.is_symlink()
+                        else Path(canonical_dir, name)
+                    )
+    return found, resolved
 
-            app.metadata_store.add_document(
-                doc_id=doc_id,
-                file_path=abs_path,
-                file_hash=doc.file_hash,
-                file_mtime=current_mtime,
-                file_type=doc.file_type,
-                collection=collection,
-                chunk_count=len(chunks),
-                markdown_path=str(markdown_file),
-            )
-        except Exception as e:
-            logger.error("[%s] Indexing failed: %s", file_path.name, e)
-            return FileIndexResult(
-                file_path=str(file_path),
-                success=False,
-                message=f"Indexing failed for {file_path.name}: {e}",
-            )
 
-        # Conversion + indexing succeeded — clear the page cache for this file
-        app.metadata_store.clear_page_cache(doc.file_hash)
+def _resolve_paths(paths: list[Path]) -> list[Path]:
+    # resolve() is an lstat per path component; overlap them, which matters
+    # most on network filesystems.
+    if len(paths) < 2:
+        return [p.resolve() for p in paths]
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_FILES, len(paths))) as pool:
+        return list(pool.map(Path.resolve, paths))
 
-        logger.info("[%s] Indexed: %d chunks stored", file_path.name, len(chunks))
-        return FileIndexResult(file_path=str(file_path), success=True)
+
+async def _index_paths(
+    app: AppContext,
+    paths: list[Path],
+    collection: str,
+    force: bool,
+    extraction_method: ExtractionMethod,
+    resolved: list[Path] | None = None,
+) -> list[FileIndexResult]:
+    if resolved is None:
+        resolved = await asyncio.to_thread(_resolve_paths, paths)
+    # One bulk SELECT for the unchanged-file check instead of one per file.
+    existing = (
+        {}
+        if force
+        else app.metadata_store.get_documents_by_paths(
+            [str(r) for r in resolved], collection
+        )
+    )
+    # A fixed pool of workers pulls from one shared iterator, so large runs
+    # never materialize a task per file.
+    results: list[FileIndexResult | None] = [None] * len(paths)
+    pending = iter(enumerate(zip(paths, resolved, strict=True)))
+    done = 0
+
+    async def worker() -> None:
+        nonlocal done
+        for i, (path, resolved_path) in pending:
+            try:
+                results[i] = await _index_single_file(
+                    app,
+                    path,
+                    resolved_path,
+                    existing.get(str(resolved_path)),
+                    collection,
+                    force,
+                    extraction_method,
+                )
+            except Exception as e:
+                # Escaping the TaskGroup would cancel every other file in
+                # flight; report this one as failed instead.
+                logger.error("[%s] Indexing failed: %s", path.name, e)
+                results[i] = FileIndexResult(
+                    file_path=str(path),
+                    success=False,
+                    message=f"Indexing failed for {path.name}: {e}",
+                )
+            # Per-file progress is DEBUG; large runs get a periodic summary.
+            done += 1
+            if done % _PROGRESS_EVERY == 0:
+                logger.info("Processed %d/%d files", done, len(paths))
+
+    async with asyncio.TaskGroup() as tg:
+        for _ in range(min(MAX_CONCURRENT_FILES, len(paths))):
+            tg.create_task(worker())
+    return [r for r in results if r is not None]
 
 
 async def index_files(
@@ -193,18 +383,8 @@ async def index_files(
 
     logger.info("Indexing %d file(s) into collection '%s'", len(file_paths), collection)
 
-    semaphore = asyncio.Semaphore(MAX_CONCURRENT_FILES)
     paths = [Path(p).expanduser() for p in file_paths]
-    results = list(
-        await asyncio.gather(
-            *[
-                _index_single_file(
-                    app, p, collection, force, semaphore, extraction_method
-                )
-                for p in paths
-            ]
-        )
-    )
+    results = await _index_paths(app, paths, collection, force, extraction_method)
 
     succeeded = sum(1 for r in results if r.success)
     failed = len(results) - succeeded
@@ -235,12 +415,9 @@ async def index_directory(
     if not app.metadata_store.collection_exists(collection):
         app.metadata_store.create_collection(collection)
 
-    if recursive:
-        files = list(directory.rglob(glob_pattern))
-    else:
-        files = list(directory.glob(glob_pattern))
-
-    supported_files = [f for f in files if f.is_file() and is_supported_file(f)]
+    supported_files, resolved_files = await asyncio.to_thread(
+        _scan_directory, directory, glob_pattern, recursive
+    )
 
     if not supported_files:
         raise NoSupportedFilesError(str(directory), list(SUPPORTED_EXTENSIONS.keys()))
@@ -252,16 +429,8 @@ async def index_directory(
         collection,
     )
 
-    semaphore = asyncio.Semaphore(MAX_CONCURRENT_FILES)
-    results = list(
-        await asyncio.gather(
-            *[
-                _index_single_file(
-                    app, p, collection, force, semaphore, extraction_method
-                )
-                for p in supported_files
-            ]
-        )
+    results = await _index_paths(
+        app, supported_files, collection, force, extraction_method, resolved_files
     )
 
     succeeded = sum(1 for r in results if r.success)
@@ -277,23 +446,20 @@ async def remove_documents(
     file_paths: list[str], collection: str, ctx: Ctx
 ) -> list[FileIndexResult]:
     app = get_app(ctx)
-    results: list[FileIndexResult] = []
-
-    for file_path in file_paths:
-        abs_path = str(Path(file_path).expanduser().resolve())
-        doc = app.metadata_store.get_document_by_path(abs_path, collection)
-
-        if doc is None:
-            results.append(
-                FileIndexResult(
-                    file_path=file_path, success=False, message="Document not found"
-                )
-            )
-        else:
-            app.vector_store.delete_document_chunks(doc.doc_id)
-            app.metadata_store.clear_page_cache(doc.file_hash)
-            Path(doc.markdown_path).unlink(missing_ok=True)
-            app.metadata_store.remove_document(doc.doc_id)
-            results.append(FileIndexResult(file_path=file_path, success=True))
-
-    return results
+    abs_paths = [str(Path(p).expanduser().resolve()) for p in file_paths]
+    found = app.metadata_store.get_documents_by_paths(abs_paths, collection)
+    # One delete per store for the whole request instead of four calls per path.
+    docs = list(found.values())
+    app.vector_store.delete_chunks_for_documents([d.doc_id for d in docs])
+    for doc in docs:
+        Path(doc.markdown_path).unlink(missing_ok=True)
+    app.metadata_store.remove_documents(docs)
+
+    return [
+        FileIndexResult(file_path=file_path, success=True)
+        if abs_path in found
+        else FileIndexResult(
+            file_path=file_path, success=False, message="Document not found"
+        )
+        for file_path, abs_path in zip(file_paths, abs_paths, strict=True)
+    ]
@@ -1,9 +1,7 @@
-import asyncio
-
 from pydantic import BaseModel
 
 from mcp_local_rag.context import Ctx, get_app
-from mcp_local_rag.processing.embeddings import embed_texts
+from mcp_local_rag.storage import vectors
 from mcp_local_rag.tools.collections import CollectionNotFoundError
 
 
@@ -18,25 +16,31 @@ class SearchResults(BaseModel):
     results: list[SearchResult]
 
 
-async def search(query: str, top_k: int, ctx: Ctx) -> SearchResults:
-    app = get_app(ctx)
-    await app.await_model_ready()
-    query_embedding = (await asyncio.to_thread(embed_texts, [query]))[0]
-    results = app.vector_store.search(query_embedding, top_k=top_k)
-
-    return SearchResults(
+def _to_results(hits: list[vectors.SearchResult]) -> SearchResults:
+    # The hits come typed from our own store, so pydantic validation per
+    # row would only re-check them.
+    return SearchResults.model_construct(
         results=[
-            SearchResult(
+            SearchResult.model_construct(
                 text=r.text,
                 file_path=r.file_path,
                 collection=r.collection,
                 score=r.score,
             )
-            for r in results
+            for r in hits
         ]
     )
 
 
+async def search(query: str, top_k: int, ctx: Ctx) -> SearchResults:
+    app = get_app(ctx)
+    await app.await_model_ready()
+    query_embedding = await app.query_batcher.embed_query(query)
+    results = app.vector_store.search(query_embedding, top_k=top_k)
+
+    return _to_results(results)
+
+
 async def search_collection(
     query: str, collection: str, top_k: int, ctx: Ctx
 ) -> SearchResults:
@@ -46,19 +50,9 @@ async def search_collection(
     if not app.metadata_store.collection_exists(collection):
         raise CollectionNotFoundError(collection)
 
-    query_embedding = (await asyncio.to_thread(embed_texts, [query]))[0]
+    query_embedding = await app.query_batcher.embed_query(query)
     results = app.vector_store.search(
         query_embedding, collection=collection, top_k=top_k
     )
 
-    return SearchResults(
-        results=[
-            SearchResult(
-                text=r.text,
-                file_path=r.file_path,
-                collection=r.collection,
-                score=r.score,
-            )
-            for r in results
-        ]
-    )
+    return _to_results(results)
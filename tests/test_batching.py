@@ -0,0 +1,67 @@
+import asyncio
+from unittest.mock import patch
+
+import numpy as np
+
+from mcp_local_rag.processing import embeddings
+from mcp_local_rag.processing.batching import EmbeddingBatcher, QueryEmbeddingBatcher
+
+MODULE = "mcp_local_rag.processing.batching"
+
+
+def _fake_embed(texts: list[str]) -> np.ndarray:
+    return np.array([[float(len(t))] for t in texts], dtype=np.float32)
+
+
+class TestEmbeddingBatcher:
+    async def test_concurrent_requests_share_one_call(self) -> None:
+        batcher = EmbeddingBatcher()
+        with patch(f"{MODULE}.embed_texts", side_effect=_fake_embed) as mock_embed:
+            first, second = await asyncio.gather(
+                batcher.embed(["a", "bb"]), batcher.embed(["ccc"])
+            )
+        mock_embed.assert_called_once_with(["a", "bb", "ccc"])
+        assert first.tolist() == [[1.0], [2.0]]
+        assert second.tolist() == [[3.0]]
+
+    async def test_batches_are_capped(self) -> None:
+        batcher = EmbeddingBatcher(max_texts=2)
+        with patch(f"{MODULE}.embed_texts", side_effect=_fake_embed) as mock_embed:
+            results = await asyncio.gather(
+                batcher.embed(["a", "b"]), batcher.embed(["c"]), batcher.embed(["d"])
+            )
+        assert [call.args[0] for call in mock_embed.call_args_list] == [
+            ["a", "b"],
+            ["c", "d"],
+        ]
+        assert [len(r) for r in results] == [2, 1, 1]
+
+    async def test_failure_reaches_every_caller_in_the_batch(self) -> None:
+        batcher = EmbeddingBatcher()
+        with patch(f"{MODULE}.embed_texts", side_effect=RuntimeError("boom")):
+            results = await asyncio.gather(
+                batcher.embed(["a"]), batcher.embed(["b"]), return_exceptions=True
+            )
+        assert all(isinstance(r, RuntimeError) for r in results)
+        with patch(f"{MODULE}.embed_texts", side_effect=_fake_embed):
+            assert (await batcher.embed(["ok"])).tolist() == [[2.0]]
+
+
+class TestQueryEmbeddingBatcher:
+    async def test_concurrent_queries_share_one_call_and_cache(self) -> None:
+        batcher = QueryEmbeddingBatcher()
+        embeddings._query_cache.clear()  # pyright: ignore[reportPrivateUsage]
+        with patch(
+            "mcp_local_rag.processing.embeddings.embed_texts", side_effect=_fake_embed
+        ) as mock_embed:
+            results = await asyncio.gather(
+                batcher.embed_query("a"),
+                batcher.embed_query("bb"),
+                batcher.embed_query("a"),
+            )
+            assert [r.tolist() for r in results] == [[1.0], [2.0], [1.0]]
+            mock_embed.assert_called_once_with(["a", "bb"])
+
+            assert (await batcher.embed_query(" bb\n")).tolist() == [2.0]
+            mock_embed.assert_called_once()
+        embeddings._query_cache.clear()  # pyright: ignore[reportPrivateUsage]
@@ -0,0 +1,35 @@
+from unittest.mock import MagicMock, patch
+
+from mcp_local_rag.config import CHUNK_SIZE
+from mcp_local_rag.processing.chunking import chunk_text
+
+MODULE = "mcp_local_rag.processing.chunking"
+
+
+class TestChunkText:
+    def test_blank_text_returns_no_chunks(self) -> None:
+        with patch(f"{MODULE}._get_splitter") as mock_splitter:
+            assert chunk_text("  \n\t ") == []
+            mock_splitter.assert_not_called()
+
+    def test_short_text_skips_tokenizer(self) -> None:
+        with patch(f"{MODULE}._get_splitter") as mock_splitter:
+            assert chunk_text("  a short page  \n") == ["a short page"]
+            mock_splitter.assert_not_called()
+
+    def test_multibyte_text_near_limit_uses_splitter(self) -> None:
+        # Fewer characters than CHUNK_SIZE, but more UTF-8 bytes.
+        text = "é" * (CHUNK_SIZE - 1)
+        splitter = MagicMock()
+        splitter.chunks.return_value = ["chunk"]
+        with patch(f"{MODULE}._get_splitter", return_value=splitter):
+            assert chunk_text(text) == ["chunk"]
+            splitter.chunks.assert_called_once_with(text)
+
+    def test_long_text_uses_splitter(self) -> None:
+        text = "word " * CHUNK_SIZE
+        splitter = MagicMock()
+        splitter.chunks.return_value = ["a", "b"]
+        with patch(f"{MODULE}._get_splitter", return_value=splitter):
+            assert chunk_text(text) == ["a", "b"]
+            splitter.chunks.assert_called_once_with(text.strip())
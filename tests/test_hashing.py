@@ -0,0 +1,43 @@
+import hashlib
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+from mcp_local_rag.processing.extractors import compute_file_hash, extract_plaintext
+
+MODULE = "mcp_local_rag.processing.extractors"
+
+
+class TestComputeFileHash:
+    def test_matches_sha256(self, tmp_path: Path) -> None:
+        path = tmp_path / "a.txt"
+        path.write_bytes(b"hello world")
+        assert compute_file_hash(path) == hashlib.sha256(b"hello world").hexdigest()
+
+    def test_unchanged_file_is_not_reread(self, tmp_path: Path) -> None:
+        path = tmp_path / "b.txt"
+        path.write_bytes(b"first")
+        first = compute_file_hash(path)
+        with patch(f"{MODULE}.hashlib.file_digest") as mock_digest:
+            assert compute_file_hash(path) == first
+            mock_digest.assert_not_called()
+
+    def test_modified_file_is_rehashed(self, tmp_path: Path) -> None:
+        path = tmp_path / "c.txt"
+        path.write_bytes(b"first")
+        first = compute_file_hash(path)
+        path.write_bytes(b"second")
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        assert compute_file_hash(path) != first
+
+
+class TestExtractPlaintext:
+    async def test_single_read_matches_text_mode(self, tmp_path: Path) -> None:
+        raw = b"a\r\nb\rc\n\xff d\xc3\xa9"
+        path = tmp_path / "notes.txt"
+        path.write_bytes(raw)
+        doc = await extract_plaintext(path)
+        with open(path, encoding="utf-8", errors="replace") as f:
+            assert doc.content == f.read()
+        assert doc.file_hash == hashlib.sha256(raw).hexdigest()
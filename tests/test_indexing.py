@@ -0,0 +1,185 @@
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+
+from mcp_local_rag.storage import DocumentInfo
+from mcp_local_rag.tools.indexing import (
+    _embed_chunks,  # pyright: ignore[reportPrivateUsage]
+    _index_paths,  # pyright: ignore[reportPrivateUsage]
+    _index_single_file,  # pyright: ignore[reportPrivateUsage]
+    _scan_directory,  # pyright: ignore[reportPrivateUsage]
+)
+
+MODULE = "mcp_local_rag.tools.indexing"
+
+
+@pytest.fixture()
+def tree(tmp_path: Path) -> Path:
+    for rel in [
+        "a.pdf",
+        "b.txt",
+        "skip.exe",
+        "sub/c.md",
+        "sub/deeper/d.PDF",
+        ".git/e.md",
+        "node_modules/pkg/README.md",
+    ]:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x")
+    (tmp_path / "link.txt").symlink_to(tmp_path / "sub" / "c.md")
+    (tmp_path / "linked_dir").symlink_to(tmp_path / "sub", target_is_directory=True)
+    return tmp_path
+
+
+def _rel(paths: list[Path], root: Path) -> set[str]:
+    return {p.relative_to(root).as_posix() for p in paths}
+
+
+class TestScanDirectory:
+    def test_non_recursive(self, tree: Path) -> None:
+        found, _ = _scan_directory(tree, "*", recursive=False)
+        assert _rel(found, tree) == {"a.pdf", "b.txt", "link.txt"}
+
+    def test_recursive_skips_ignored_and_symlinked_dirs(self, tree: Path) -> None:
+        found, _ = _scan_directory(tree, "*", recursive=True)
+        assert _rel(found, tree) == {
+            "a.pdf",
+            "b.txt",
+            "link.txt",
+            "sub/c.md",
+            "sub/deeper/d.PDF",
+        }
+
+    def test_pattern_matches_names(self, tree: Path) -> None:
+        found, _ = _scan_directory(tree, "*.md", recursive=True)
+        assert _rel(found, tree) == {"sub/c.md"}
+
+    def test_resolved_paths_are_canonical(self, tree: Path) -> None:
+        found, resolved = _scan_directory(tree, "*", recursive=True)
+        assert resolved == [p.resolve() for p in found]
+
+    def test_multi_component_pattern_uses_glob(self, tree: Path) -> None:
+        found, resolved = _scan_directory(tree, "sub/*.md", recursive=False)
+        assert _rel(found, tree) == {"sub/c.md"}
+        assert resolved == [p.resolve() for p in found]
+
+
+def _document(
+    path: Path, file_size: int | None, file_mtime: float = 0.0
+) -> DocumentInfo:
+    return DocumentInfo(
+        doc_id="id",
+        file_path=str(path),
+        file_hash="old-hash",
+        file_mtime=file_mtime,
+        file_type="txt",
+        collection="docs",
+        chunk_count=1,
+        markdown_path="",
+        indexed_at=datetime.now(),
+        file_size=file_size,
+    )
+
+
+class TestChangeDetection:
+    async def _index(self, path: Path, existing: DocumentInfo) -> MagicMock:
+        with (
+            patch(f"{MODULE}.compute_file_hash", return_value="old-hash") as mock_hash,
+            patch(f"{MODULE}.extract_document", AsyncMock(side_effect=RuntimeError)),
+        ):
+            await _index_single_file(
+                MagicMock(), path, path, existing, "docs", force=False
+            )
+        return mock_hash
+
+    async def test_size_change_skips_hash(self, tmp_path: Path) -> None:
+        path = tmp_path / "a.txt"
+        path.write_text("grown")
+        mock_hash = await self._index(path, _document(path, 1))
+        mock_hash.assert_not_called()
+
+    async def test_matching_stat_skips_hash_and_extract(self, tmp_path: Path) -> None:
+        path = tmp_path / "a.txt"
+        path.write_text("same")
+        st = path.stat()
+        existing = _document(path, st.st_size, st.st_mtime)
+        with (
+            patch(f"{MODULE}.compute_file_hash") as mock_hash,
+            patch(f"{MODULE}.extract_document") as mock_extract,
+        ):
+            result = await _index_single_file(
+                MagicMock(), path, path, existing, "docs", force=False
+            )
+        assert result.success
+        mock_hash.assert_not_called()
+        mock_extract.assert_not_called()
+
+    async def test_same_mtime_with_new_size_is_reindexed(self, tmp_path: Path) -> None:
+        path = tmp_path / "a.txt"
+        path.write_text("changed")
+        existing = _document(path, 1, path.stat().st_mtime)
+        with patch(f"{MODULE}.extract_document", AsyncMock(side_effect=RuntimeError)):
+            result = await _index_single_file(
+                MagicMock(), path, path, existing, "docs", force=False
+            )
+        assert not result.success
+
+    @pytest.mark.parametrize("file_size", [None, 5])
+    async def test_same_or_unknown_size_is_hashed(
+        self, tmp_path: Path, file_size: int | None
+    ) -> None:
+        path = tmp_path / "a.txt"
+        path.write_text("touch")
+        mock_hash = await self._index(path, _document(path, file_size))
+        mock_hash.assert_called_once()
+
+
+class TestEmbedChunks:
+    async def test_only_new_chunks_are_embedded(self, tmp_path: Path) -> None:
+        app = MagicMock()
+        app.vector_store.get_chunk_vectors.return_value = {
+            "kept": np.array([1.0, 0.0], dtype=np.float32)
+        }
+        app.embedding_batcher.embed = AsyncMock(
+            return_value=np.array([[0.0, 1.0]], dtype=np.float32)
+        )
+        previous = _document(tmp_path / "a.txt", 1)
+        embeddings = await _embed_chunks(app, ["kept", "new", "new"], previous)
+        app.embedding_batcher.embed.assert_awaited_once_with(["new"])
+        assert embeddings.tolist() == [[1.0, 0.0], [0.0, 1.0], [0.0, 1.0]]
+
+    async def test_without_previous_embeds_everything(self) -> None:
+        app = MagicMock()
+        app.embedding_batcher.embed = AsyncMock(return_value="all")
+        assert await _embed_chunks(app, ["a", "b"], None) == "all"
+        app.vector_store.get_chunk_vectors.assert_not_called()
+
+
+class TestIndexPaths:
+    async def test_failing_file_does_not_abort_run(self, tmp_path: Path) -> None:
+        paths = [tmp_path / name for name in ("bad.txt", "good.txt")]
+        for path in paths:
+            path.write_text("changed")
+        app = MagicMock()
+        app.metadata_store.get_documents_by_paths.return_value = {
+            str(p): _document(p, None) for p in paths
+        }
+
+        def compute_hash(path: Path) -> str:
+            if path.name == "bad.txt":
+                raise PermissionError("denied")
+            return "old-hash"
+
+        with patch(f"{MODULE}.compute_file_hash", side_effect=compute_hash):
+            results = await _index_paths(
+                app, paths, "docs", force=False, extraction_method="auto"
+            )
+        assert [(r.file_path, r.success) for r in results] == [
+            (str(paths[0]), False),
+            (str(paths[1]), True),
+        ]
+        assert results[0].message == "Indexing failed for bad.txt: denied"
@@ -0,0 +1,148 @@
+from collections.abc import Generator
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from mcp_local_rag.storage.metadata import MetadataStore
+
+
+@pytest.fixture()
+def store(tmp_path: Path) -> Generator[MetadataStore]:
+    store = MetadataStore(tmp_path / "metadata.db")
+    yield store
+    store.close()
+
+
+class TestConnection:
+    def test_connection_is_reused(self, store: MetadataStore) -> None:
+        with store._get_connection() as first:  # pyright: ignore[reportPrivateUsage]
+            pass
+        with store._get_connection() as second:  # pyright: ignore[reportPrivateUsage]
+            pass
+        assert first is second
+
+    def test_reopens_after_close(self, store: MetadataStore) -> None:
+        assert store.create_collection("docs")
+        store.close()
+        assert store.collection_exists("docs")
+
+    def test_failed_block_is_rolled_back(self, store: MetadataStore) -> None:
+        with pytest.raises(RuntimeError):
+            with store._get_connection() as conn:  # pyright: ignore[reportPrivateUsage]
+                conn.execute("INSERT INTO collections (name) VALUES ('docs')")
+                raise RuntimeError("boom")
+        assert not store.collection_exists("docs")
+
+
+class TestPageCache:
+    def test_cache_pages_round_trip(self, store: MetadataStore) -> None:
+        store.cache_pages("abc", [(0, "first"), (2, "third")])
+        assert store.get_cached_pages("abc") == {0: "first", 2: "third"}
+        assert store.get_cached_pages("other") == {}
+        assert store.clear_page_cache("abc") == 2
+        assert store.get_cached_pages("abc") == {}
+
+
+class TestDocumentCount:
+    def _add(self, store: MetadataStore, doc_id: str, collection: str) -> None:
+        store.add_document(doc_id, f"/{doc_id}.txt", "h", 0.0, "txt", collection, 1, "")
+
+    def test_count_tracks_adds_replaces_and_removes(self, store: MetadataStore) -> None:
+        store.create_collection("docs")
+        self._add(store, "a", "docs")
+        self._add(store, "b", "docs")
+        self._add(store, "a", "docs")
+        info = store.get_collection("docs")
+        assert info is not None and info.document_count == 2
+        assert store.remove_document("a")
+        assert [c.document_count for c in store.list_collections()] == [1]
+
+    def test_existing_database_is_backfilled(self, tmp_path: Path) -> None:
+        db_path = tmp_path / "metadata.db"
+        store = MetadataStore(db_path)
+        store.create_collection("docs")
+        self._add(store, "a", "docs")
+        with store._get_connection() as conn:  # pyright: ignore[reportPrivateUsage]
+            for trigger in ("insert", "delete", "move"):
+                conn.execute(f"DROP TRIGGER trg_documents_{trigger}")
+            conn.execute("ALTER TABLE collections DROP COLUMN document_count")
+        store.close()
+
+        reopened = MetadataStore(db_path)
+        info = reopened.get_collection("docs")
+        assert info is not None and info.document_count == 1
+        reopened.close()
+
+
+class TestIndexes:
+    def test_path_lookup_uses_composite_index(self, store: MetadataStore) -> None:
+        with store._get_connection() as conn:  # pyright: ignore[reportPrivateUsage]
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT file_hash FROM documents "
+                "WHERE file_path = ? AND collection = ?",
+                ("/a.txt", "docs"),
+            ).fetchall()
+        detail = " ".join(row["detail"] for row in plan)
+        assert "COVERING INDEX idx_documents_path_collection" in detail
+
+
+class TestDocuments:
+    def test_list_documents_matches_single_lookups(self, store: MetadataStore) -> None:
+        store.create_collection("docs")
+        store.add_document("b", "/b.txt", "hb", 2.5, "txt", "docs", 3, "/b.md")
+        store.add_document("a", "/a.txt", "ha", 0.0, "txt", "docs", 1, "/a.md")
+        listed = store.list_documents("docs")
+        assert [d.doc_id for d in listed] == ["a", "b"]
+        assert listed == [store.get_document("a"), store.get_document("b")]
+        assert listed[1] == store.get_document_by_path("/b.txt", "docs")
+        assert isinstance(listed[0].indexed_at, datetime)
+        assert store.list_documents() == listed
+
+    def test_file_size_is_stored_and_backfilled(self, store: MetadataStore) -> None:
+        store.create_collection("docs")
+        store.add_document("a", "/a.txt", "ha", 0.0, "txt", "docs", 1, "", 10)
+        store.add_document("b", "/b.txt", "hb", 0.0, "txt", "docs", 1, "")
+        store.update_document_mtime("a", 1.0)
+        store.update_document_mtime("b", 1.0, 20)
+        assert [d.file_size for d in store.list_documents("docs")] == [10, 20]
+
+    def test_bulk_lookup_and_remove(self, store: MetadataStore) -> None:
+        store.create_collection("docs")
+        store.add_document("a", "/a.txt", "ha", 0.0, "txt", "docs", 1, "/a.md")
+        store.add_document("b", "/b.txt", "hb", 0.0, "txt", "docs", 1, "/b.md")
+        store.cache_pages("ha", [(0, "page")])
+        found = store.get_documents_by_paths(["/a.txt", "/missing.txt"], "docs")
+        assert list(found) == ["/a.txt"]
+        store.remove_documents(list(found.values()))
+        assert [d.doc_id for d in store.list_documents("docs")] == ["b"]
+        assert store.get_cached_pages("ha") == {}
+
+
+class TestCollectionExists:
+    def test_sees_changes_from_another_store(self, tmp_path: Path) -> None:
+        writer = MetadataStore(tmp_path / "metadata.db")
+        reader = MetadataStore(tmp_path / "metadata.db")
+        writer.create_collection("docs")
+        assert reader.collection_exists("docs")
+        writer.delete_collection("docs")
+        assert not reader.collection_exists("docs")
+        writer.close()
+        reader.close()
+
+
+class TestTransaction:
+    def test_nested_calls_commit_together(self, store: MetadataStore) -> None:
+        with pytest.raises(RuntimeError):
+            with store.transaction():
+                store.create_collection("docs")
+                store.cache_pages("abc", [(0, "page")])
+                raise RuntimeError("boom")
+        assert not store.collection_exists("docs")
+        assert store.get_cached_pages("abc") == {}
+
+        with store.transaction():
+            store.create_collection("docs")
+            store.cache_pages("abc", [(0, "page")])
+        assert store.collection_exists("docs")
+        assert store.get_cached_pages("abc") == {0: "page"}
@@ -0,0 +1,26 @@
+import time
+
+import pytest
+
+from mcp_local_rag.processing.ratelimit import RateLimiter
+
+
+class TestRateLimiter:
+    async def test_burst_up_to_rate_is_immediate(self) -> None:
+        limiter = RateLimiter(3, period=60.0)
+        start = time.monotonic()
+        for _ in range(3):
+            await limiter.acquire()
+        assert time.monotonic() - start < 0.05
+
+    async def test_waits_for_refill_past_rate(self) -> None:
+        limiter = RateLimiter(2, period=0.2)
+        await limiter.acquire()
+        await limiter.acquire()
+        start = time.monotonic()
+        await limiter.acquire()
+        assert time.monotonic() - start >= 0.08
+
+    def test_rejects_non_positive_rate(self) -> None:
+        with pytest.raises(ValueError):
+            RateLimiter(0)
@@ -0,0 +1,118 @@
+import asyncio
+from pathlib import Path
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from google.genai import errors, types
+
+from mcp_local_rag.processing.extractors import (
+    _gemini_ocr_pdf_pages_with_retry,  # pyright: ignore[reportPrivateUsage]
+    _gemini_retry_delay,  # pyright: ignore[reportPrivateUsage]
+    _get_retry_after_seconds,  # pyright: ignore[reportPrivateUsage]
+)
+
+MODULE = "mcp_local_rag.processing.extractors"
+
+
+def _rate_limit_error(retry_after: str | None) -> Any:
+    error: Any = Exception("rate limited")
+    error.response = MagicMock()
+    error.response.headers = {} if retry_after is None else {"Retry-After": retry_after}
+    return error
+
+
+class TestGetRetryAfterSeconds:
+    def test_delay_seconds(self) -> None:
+        assert _get_retry_after_seconds(_rate_limit_error(" 12 ")) == 12.0
+
+    def test_past_http_date_is_zero(self) -> None:
+        error = _rate_limit_error("Wed, 21 Oct 2015 07:28:00 GMT")
+        assert _get_retry_after_seconds(error) == 0.0
+
+    @pytest.mark.parametrize("value", [None, "soon", "²", ""])
+    def test_missing_or_unparsable_value_reraises(self, value: str | None) -> None:
+        with pytest.raises(Exception, match="rate limited"):
+            _get_retry_after_seconds(_rate_limit_error(value))
+
+
+class TestGeminiRetryDelay:
+    def test_rate_limit_honours_retry_after_floor(self) -> None:
+        error = errors.ClientError(429, {}, None)
+        with patch(f"{MODULE}._get_retry_after_seconds", return_value=30.0):
+            assert _gemini_retry_delay(error, 0) == 30.0
+
+    def test_rate_limit_without_retry_after_backs_off(self) -> None:
+        error = errors.ClientError(429, {}, None)
+        with patch(f"{MODULE}._get_retry_after_seconds", side_effect=error):
+            assert 0.5 <= _gemini_retry_delay(error, 0) <= 1.5
+            assert 4.0 <= _gemini_retry_delay(error, 3) <= 12.0
+
+    def test_server_error_backs_off_with_cap(self) -> None:
+        error = errors.ServerError(503, {}, None)
+        assert 30.0 <= _gemini_retry_delay(error, 20) <= 90.0
+
+    def test_other_client_error_is_not_retried(self) -> None:
+        error = errors.ClientError(400, {}, None)
+        with pytest.raises(errors.ClientError):
+            _gemini_retry_delay(error, 0)
+
+
+class TestGeminiPdfRateLimit:
+    async def test_page_by_page_fallback_is_rate_limited(self) -> None:
+        gemini = MagicMock()
+        gemini.aio.models.generate_content = AsyncMock(
+            side_effect=[MagicMock(text=t) for t in ["merged", "p1", "p2", "p3"]]
+        )
+        limiter = MagicMock()
+        limiter.acquire = AsyncMock()
+        with patch(f"{MODULE}._convert_pdf_pages_to_bytes", return_value=b""):
+            pages = await _gemini_ocr_pdf_pages_with_retry(
+                file_path=Path("/fake/doc.pdf"),
+                src_doc=MagicMock(),
+                doc_lock=asyncio.Lock(),
+                page_indices=[0, 1, 2],
+                gemini_client=gemini,
+                semaphore=asyncio.Semaphore(1),
+                rate_limiter=limiter,
+            )
+        assert pages == ["p1", "p2", "p3"]
+        assert gemini.aio.models.generate_content.await_count == 4
+        assert limiter.acquire.await_count == 4
+
+    async def test_failed_fallback_page_is_retried_alone(self) -> None:
+        sent: list[bytes] = []
+        failed = False
+
+        def convert(*, first_page: int, last_page: int, **_: Any) -> bytes:
+            return f"{first_page}-{last_page}".encode()
+
+        async def generate(*, contents: list[Any], **_: Any) -> MagicMock:
+            nonlocal failed
+            part: types.Part = contents[0]
+            assert part.inline_data is not None and part.inline_data.data is not None
+            data = part.inline_data.data
+            sent.append(data)
+            if data == b"0-1":
+                return MagicMock(text="merged")
+            if data == b"1-1" and not failed:
+                failed = True
+                raise errors.ClientError(429, {}, None)
+            return MagicMock(text=f"page {data.decode()}")
+
+        gemini = MagicMock()
+        gemini.aio.models.generate_content = generate
+        with (
+            patch(f"{MODULE}._convert_pdf_pages_to_bytes", side_effect=convert),
+            patch(f"{MODULE}._gemini_retry_delay", return_value=0.0),
+        ):
+            pages = await _gemini_ocr_pdf_pages_with_retry(
+                file_path=Path("/fake/doc.pdf"),
+                src_doc=MagicMock(),
+                doc_lock=asyncio.Lock(),
+                page_indices=[0, 1],
+                gemini_client=gemini,
+                semaphore=asyncio.Semaphore(1),
+            )
+        assert pages == ["page 0-0", "page 1-1"]
+        assert sorted(sent) == [b"0-0", b"0-1", b"1-1", b"1-1"]
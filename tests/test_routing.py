@@ -1,5 +1,7 @@
+import asyncio
 from collections.abc import Generator
 from pathlib import Path
+import threading
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -7,11 +9,13 @@ import pytest
 from mcp_local_rag.config import SUPPORTED_EXTENSIONS
 from mcp_local_rag.processing.extractors import (
     ExtractedDocument,
+    _batch_page_indices,  # pyright: ignore[reportPrivateUsage]
     extract_azure_di_document,
     extract_document,
     extract_image,
     extract_pdf,
     is_supported_file,
+    is_supported_name,
     provider_supports_file,
 )
 
@@ -130,6 +134,19 @@ class TestIsSupportedFile:
     def test_unsupported(self, suffix: str) -> None:
         assert is_supported_file(Path(f"test{suffix}")) is False
 
+    def test_suffix_is_case_insensitive(self) -> None:
+        assert is_supported_file(Path("/some/dir/REPORT.PDF")) is True
+
+    @pytest.mark.parametrize("name", [".pdf", "archive.pdf.", "noext"])
+    def test_matches_path_suffix_semantics(self, name: str) -> None:
+        assert is_supported_file(Path(name)) is False
+
+    @pytest.mark.parametrize(
+        "name", ["REPORT.PDF", "a.b.md", ".pdf", "archive.pdf.", "noext", "x.csv"]
+    )
+    def test_name_check_agrees_with_path_check(self, name: str) -> None:
+        assert is_supported_name(name) is is_supported_file(Path(name))
+
 
 class TestExtractDocumentDispatch:
     @pytest.fixture()
@@ -451,11 +468,19 @@ class TestPdfFallback:
         with patch(f"{MODULE}.compute_file_hash", return_value=DUMMY_HASH):
             yield
 
+    @pytest.fixture(autouse=True)
+    def mock_doc(self) -> Generator[MagicMock]:
+        doc = MagicMock()
+        doc.__len__.return_value = 1
+        doc.pages.return_value = [MagicMock()]
+        with patch("pymupdf.open", return_value=doc):
+            yield doc
+
     @pytest.fixture()
     def metadata_store(self) -> MagicMock:
         store = MagicMock()
         store.get_file_metadata = MagicMock(return_value=None)
-        store.get_cached_page = MagicMock(return_value=None)
+        store.get_cached_pages = MagicMock(return_value={})
         store.cache_page = MagicMock()
         store.clear_page_cache = MagicMock()
         return store
@@ -480,7 +505,6 @@ class TestPdfFallback:
                 new_callable=AsyncMock,
                 return_value=DUMMY_CONTENT,
             ) as mock_azure,
-            patch(f"{MODULE}._get_pdf_page_count", return_value=1),
         ):
             result = await extract_pdf(
                 Path("/fake/doc.pdf"),
@@ -491,58 +515,147 @@ class TestPdfFallback:
             mock_azure.assert_called_once()
             assert result.file_type == "pdf"
 
-    async def test_auto_falls_back_to_pymupdf(self, metadata_store: MagicMock) -> None:
-        with (
-            patch(f"{MODULE}._get_pdf_page_count", return_value=1),
-            patch(f"{MODULE}._pymupdf_to_markdown", return_value=DUMMY_CONTENT),
-            patch(f"{MODULE}.pymupdf") as mock_pymupdf,
-        ):
-            mock_doc = MagicMock()
-            mock_doc.pages.return_value = [MagicMock()]
-            mock_pymupdf.open.return_value = mock_doc
+    async def test_auto_falls_back_to_pymupdf(
+        self, metadata_store: MagicMock, mock_doc: MagicMock
+    ) -> None:
+        with patch(
+            f"{MODULE}._pymupdf_pages_to_markdown", return_value=[DUMMY_CONTENT]
+        ) as mock_pages:
             result = await extract_pdf(
                 Path("/fake/doc.pdf"),
                 metadata_store=metadata_store,
                 azure_di_client=None,
                 gemini_client=None,
             )
+            mock_pages.assert_called_once_with(mock_doc, [0])
             assert result.file_type == "pdf"
+            assert result.content == DUMMY_CONTENT
 
     async def test_explicit_azure_not_configured_raises(
+        self, metadata_store: MagicMock, mock_doc: MagicMock
+    ) -> None:
+        with pytest.raises(RuntimeError):
+            await extract_pdf(
+                Path("/fake/doc.pdf"),
+                metadata_store=metadata_store,
+                azure_di_client=None,
+                extraction_method="azure",
+            )
+        mock_doc.close.assert_called_once()
+
+    async def test_explicit_pymupdf(
+        self, metadata_store: MagicMock, mock_doc: MagicMock
+    ) -> None:
+        with patch(
+            f"{MODULE}._pymupdf_to_markdown", return_value=DUMMY_CONTENT
+        ) as mock_pymupdf:
+            result = await extract_pdf(
+                Path("/fake/doc.pdf"),
+                metadata_store=metadata_store,
+                extraction_method="pymupdf",
+            )
+            mock_pymupdf.assert_called_once_with(mock_doc)
+            assert result.file_type == "pdf"
+            assert result.page_count == 1
+        mock_doc.close.assert_called_once()
+
+    async def test_explicit_gemini_not_configured_raises(
         self, metadata_store: MagicMock
     ) -> None:
-        with patch(f"{MODULE}._get_pdf_page_count", return_value=1):
-            with pytest.raises(RuntimeError):
+        with pytest.raises(RuntimeError):
+            await extract_pdf(
+                Path("/fake/doc.pdf"),
+                metadata_store=metadata_store,
+                gemini_client=None,
+                extraction_method="gemini",
+            )
+
+    async def test_gemini_failure_raises_by_default(
+        self, metadata_store: MagicMock, gemini: MagicMock
+    ) -> None:
+        with patch(
+            f"{MODULE}._gemini_ocr_pdf_pages_with_retry",
+            new_callable=AsyncMock,
+            side_effect=RuntimeError("boom"),
+        ):
+            with pytest.raises(RuntimeError, match="pages 1"):
                 await extract_pdf(
                     Path("/fake/doc.pdf"),
                     metadata_store=metadata_store,
-                    azure_di_client=None,
-                    extraction_method="azure",
+                    gemini_client=gemini,
+                    extraction_method="gemini",
                 )
 
-    async def test_explicit_pymupdf(self, metadata_store: MagicMock) -> None:
+    async def test_gemini_failure_falls_back_to_text_layer(
+        self, metadata_store: MagicMock, gemini: MagicMock, mock_doc: MagicMock
+    ) -> None:
         with (
-            patch(f"{MODULE}._get_pdf_page_count", return_value=1),
+            patch(f"{MODULE}.GEMINI_FAILURE_FALLBACK", "pymupdf"),
             patch(
-                f"{MODULE}._pymupdf_to_markdown", return_value=DUMMY_CONTENT
-            ) as mock_pymupdf,
+                f"{MODULE}._gemini_ocr_pdf_pages_with_retry",
+                new_callable=AsyncMock,
+                side_effect=RuntimeError("boom"),
+            ),
+            patch(
+                f"{MODULE}._pymupdf_pages_to_markdown", return_value=[DUMMY_CONTENT]
+            ) as mock_pages,
         ):
             result = await extract_pdf(
                 Path("/fake/doc.pdf"),
                 metadata_store=metadata_store,
-                extraction_method="pymupdf",
+                gemini_client=gemini,
+                extraction_method="gemini",
             )
-            mock_pymupdf.assert_called_once()
-            assert result.file_type == "pdf"
+            mock_pages.assert_called_once_with(mock_doc, [0])
+            assert result.content == DUMMY_CONTENT
 
-    async def test_explicit_gemini_not_configured_raises(
-        self, metadata_store: MagicMock
+    async def test_cancel_waits_for_page_conversion_before_close(
+        self, metadata_store: MagicMock, gemini: MagicMock, mock_doc: MagicMock
     ) -> None:
-        with patch(f"{MODULE}._get_pdf_page_count", return_value=1):
-            with pytest.raises(RuntimeError):
-                await extract_pdf(
+        started = threading.Event()
+        release = threading.Event()
+        finished = threading.Event()
+
+        def convert(**_: object) -> bytes:
+            started.set()
+            release.wait(5)
+            finished.set()
+            return b""
+
+        closed_after_thread: list[bool] = []
+        mock_doc.close.side_effect = lambda: closed_after_thread.append(
+            finished.is_set()
+        )
+        with patch(f"{MODULE}._convert_pdf_pages_to_bytes", side_effect=convert):
+            task = asyncio.create_task(
+                extract_pdf(
                     Path("/fake/doc.pdf"),
                     metadata_store=metadata_store,
-                    gemini_client=None,
+                    gemini_client=gemini,
                     extraction_method="gemini",
                 )
+            )
+            await asyncio.to_thread(started.wait, 5)
+            task.cancel()
+            await asyncio.sleep(0.05)
+            mock_doc.close.assert_not_called()
+            release.set()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        assert closed_after_thread == [True]
+
+
+class TestBatchPageIndices:
+    def test_single_page_batches(self) -> None:
+        assert _batch_page_indices([0, 1, 4], 1) == [[0], [1], [4]]
+
+    def test_groups_consecutive_runs_up_to_size(self) -> None:
+        assert _batch_page_indices([0, 1, 2, 3, 7, 8, 10], 3) == [
+            [0, 1, 2],
+            [3],
+            [7, 8],
+            [10],
+        ]
+
+    def test_empty(self) -> None:
+        assert _batch_page_indices([], 5) == []
@@ -0,0 +1,77 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+from mcp_local_rag.storage.vectors import VectorStore
+
+MODULE = "mcp_local_rag.storage.vectors"
+
+
+class TestEnsureCollection:
+    def test_ready_marker_skips_setup_on_restart(self, tmp_path: Path) -> None:
+        with patch(f"{MODULE}.get_embedding_dimension", return_value=4):
+            store = VectorStore(db_path=tmp_path / "qdrant")
+            store.add_chunks(["a"], np.ones((1, 4), dtype=np.float32), "d", "/a", "c")
+            store.close()
+        assert (tmp_path / "qdrant" / ".ready").exists()
+
+        store = VectorStore(db_path=tmp_path / "qdrant")
+        with patch.object(VectorStore, "_ensure_collection") as mock_ensure:
+            results = store.search(np.ones(4, dtype=np.float32), top_k=1)
+        mock_ensure.assert_not_called()
+        assert [r.text for r in results] == ["a"]
+        store.close()
+
+    def test_stale_marker_reruns_setup(self, tmp_path: Path) -> None:
+        (tmp_path / "qdrant").mkdir()
+        marker = tmp_path / "qdrant" / ".ready"
+        marker.write_text("0")
+        store = VectorStore(db_path=tmp_path / "qdrant")
+        with patch.object(VectorStore, "_ensure_collection") as mock_ensure:
+            store._ensure_collection_once()  # pyright: ignore[reportPrivateUsage]
+        mock_ensure.assert_called_once()
+        assert marker.read_text() != "0"
+
+
+class TestSearch:
+    def test_doc_ids_filter(self, tmp_path: Path) -> None:
+        with patch(f"{MODULE}.get_embedding_dimension", return_value=4):
+            store = VectorStore(db_path=tmp_path / "qdrant")
+            vectors = np.eye(3, 4, dtype=np.float32)
+            for i, doc_id in enumerate(["d0", "d1", "d2"]):
+                store.add_chunks(
+                    [doc_id], vectors[i : i + 1], doc_id, f"/{doc_id}", "c"
+                )
+            results = store.search(vectors[0], top_k=3, doc_ids=["d1", "d2"])
+        assert sorted(r.doc_id for r in results) == ["d1", "d2"]
+        store.close()
+
+
+class TestDelete:
+    def test_delete_chunks_for_documents(self, tmp_path: Path) -> None:
+        with patch(f"{MODULE}.get_embedding_dimension", return_value=4):
+            store = VectorStore(db_path=tmp_path / "qdrant")
+            vectors = np.eye(3, 4, dtype=np.float32)
+            for i, doc_id in enumerate(["d0", "d1", "d2"]):
+                store.add_chunks(
+                    [doc_id], vectors[i : i + 1], doc_id, f"/{doc_id}", "c"
+                )
+            store.delete_chunks_for_documents(["d0", "d2"])
+            results = store.search(vectors[0], top_k=3)
+        assert [r.doc_id for r in results] == ["d1"]
+        store.close()
+
+
+class TestChunkVectors:
+    def test_returns_stored_vector_per_text(self, tmp_path: Path) -> None:
+        with patch(f"{MODULE}.get_embedding_dimension", return_value=4):
+            store = VectorStore(db_path=tmp_path / "qdrant")
+            vectors = np.eye(3, 4, dtype=np.float32)
+            store.add_chunks(["a", "b"], vectors[:2], "d0", "/d0", "c")
+            store.add_chunks(["c"], vectors[2:], "d1", "/d1", "c")
+            found = store.get_chunk_vectors("d0")
+        assert sorted(found) == ["a", "b"]
+        np.testing.assert_allclose(found["b"], vectors[1])
+        assert store.get_chunk_vectors("missing") == {}
+        store.close()